@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import (
+    Checkpoint_Importacion,
     Comunidad_Etnica,
     Contacto_Servicio_Salud,
     Diagnostico,
@@ -7,6 +8,7 @@ from .models import (
     Entidad_Prestadora_Salud,
     Enfermedad_Huerfana,
     Etnia,
+    Manifiesto_Importacion,
     Modalidad_Realizacion_Tecnologia_Salud,
     Motivo_Atencion,
     Municipio,
@@ -16,7 +18,9 @@ from .models import (
     Paciente_Discapacidad,
     Paciente_Pais,
     Pais,
+    Snapshot_Catalogo,
     Tipo_documento,
+    Version_Catalogos,
     Via_Ingreso_Servicio_Salud,
     Voluntad_Anticipada,
 )
@@ -130,6 +134,32 @@ class DiagnosticoAdmin(admin.ModelAdmin):
     search_fields = ("codigo_diagnostico", "nombre_diagnostico")
 
 
+# ============================================================================
+# IMPORT MANIFESTS
+# ============================================================================
+
+@admin.register(Manifiesto_Importacion)
+class ManifiestoImportacionAdmin(admin.ModelAdmin):
+    list_display = ("catalogo", "archivo", "filas", "hash_archivo", "fecha_importacion")
+    search_fields = ("catalogo", "archivo")
+    readonly_fields = ("catalogo", "archivo", "hash_archivo", "filas", "fecha_importacion")
+
+
+@admin.register(Checkpoint_Importacion)
+class CheckpointImportacionAdmin(admin.ModelAdmin):
+    list_display = ("carga", "archivo", "filas_procesadas", "creados", "actualizados", "completado", "fecha_actualizacion")
+    search_fields = ("carga", "archivo")
+    list_filter = ("completado",)
+
 
+@admin.register(Snapshot_Catalogo)
+class SnapshotCatalogoAdmin(admin.ModelAdmin):
+    list_display = ("catalogo", "version", "filas", "hash_contenido", "fecha_carga")
+    search_fields = ("catalogo", "version")
+    readonly_fields = ("catalogo", "version", "hash_contenido", "filas", "fecha_carga")
 
 
+@admin.register(Version_Catalogos)
+class VersionCatalogosAdmin(admin.ModelAdmin):
+    list_display = ("version", "fecha_actualizacion")
+    readonly_fields = ("version", "fecha_actualizacion")
@@ -0,0 +1,91 @@
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from .busqueda import normalizar, tokenizar
+from .cache_catalogos import catalogos
+from .models import Diagnostico, Enfermedad_Huerfana, Municipio, Ocupacion, Pais
+
+# catalogo -> (modelo, campo con el nombre); el código es la PK del modelo
+CATALOGOS_AUTOCOMPLETAR = {
+    "diagnostico": (Diagnostico, "nombre_diagnostico"),
+    "ocupacion": (Ocupacion, "nombre_ocupacion"),
+    "municipio": (Municipio, "nombre_municipio"),
+    "enfermedad_huerfana": (Enfermedad_Huerfana, "nombre_enfermedad_huerfana"),
+    "pais": (Pais, "nombre_pais"),
+}
+LIMITE_RESULTADOS = 20
+
+
+def _clave_codigo(texto: str) -> str:
+    # "A00.0", "a000" y "A00 0" son el mismo código
+    return re.sub(r"[^a-z0-9]", "", normalizar(texto))
+
+
+class IndiceCatalogo:
+    """
+    Índice en memoria de un catálogo: códigos y tokens de los nombres
+    (normalizados como en la búsqueda de pacientes) en listas ordenadas, así
+    cada prefijo se resuelve con bisect sin tocar la base de datos.
+    """
+
+    def __init__(self, filas: List[Tuple[str, str]], version: int = None):
+        self.version = version
+        self.nombres: Dict[str, str] = dict(filas)
+        self.codigos = sorted((_clave_codigo(codigo), codigo) for codigo in self.nombres)
+        self.tokens = sorted((token, codigo) for codigo, nombre in filas for token in tokenizar(nombre))
+
+    @staticmethod
+    def _rango(lista, prefijo: str):
+        i = bisect_left(lista, (prefijo,))
+        while i < len(lista) and lista[i][0].startswith(prefijo):
+            yield lista[i]
+            i += 1
+
+    def buscar(self, consulta: str, limite: int = LIMITE_RESULTADOS) -> List[Tuple[str, str]]:
+        """
+        Primero los códigos que empiezan por la consulta (el exacto antes), luego
+        los nombres que contienen un token con cada término como prefijo, los
+        más cortos primero.
+        """
+        encontrados = {}
+        clave = _clave_codigo(consulta)
+        if clave:
+            for _, codigo in self._rango(self.codigos, clave):
+                encontrados.setdefault(codigo, None)
+                if len(encontrados) >= limite:
+                    break
+
+        coincidencias = None
+        for termino in tokenizar(consulta):
+            codigos = {codigo for _, codigo in self._rango(self.tokens, termino)}
+            coincidencias = codigos if coincidencias is None else coincidencias & codigos
+        for codigo in sorted(coincidencias or (), key=lambda c: (len(self.nombres[c]), c)):
+            if len(encontrados) >= limite:
+                break
+            encontrados.setdefault(codigo, None)
+
+        return [(codigo, self.nombres[codigo]) for codigo in encontrados]
+
+
+_indices: Dict[str, IndiceCatalogo] = {}
+_lock = threading.Lock()
+
+
+def indice(catalogo: str) -> IndiceCatalogo:
+    """
+    Índice del catálogo, construido desde la caché de catálogos; se rehace
+    cuando cambia la versión global (ver cache_catalogos).
+    """
+    version = catalogos.version()
+    actual = _indices.get(catalogo)
+    if actual is not None and actual.version == version:
+        return actual
+    model, campo = CATALOGOS_AUTOCOMPLETAR[catalogo]
+    with _lock:
+        actual = _indices.get(catalogo)
+        if actual is None or actual.version != version:
+            filas = [(pk, getattr(obj, campo)) for pk, obj in catalogos.tabla(model).items()]
+            actual = _indices[catalogo] = IndiceCatalogo(filas, version)
+        return actual
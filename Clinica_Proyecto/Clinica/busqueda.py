@@ -0,0 +1,91 @@
+import re
+import unicodedata
+from typing import Iterable, Set, Tuple
+
+from django.db.models import Exists, F, OuterRef
+
+from .models import Paciente, Paciente_Busqueda
+
+CAMPOS_NOMBRE = ["primer_nombre", "segundo_nombre", "primer_apellido", "segundo_apellido"]
+TOKEN_MINIMO = 2  # tokens más cortos no acotan lo suficiente el rango del índice
+MUESTRA_SELECTIVIDAD = 1000  # filas a contar por término para elegir el más selectivo
+
+
+def normalizar(texto) -> str:
+    """
+    Minúsculas, sin tildes ni diéresis y con la ñ plegada a n: "Núñez" -> "nunez".
+    """
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(*textos) -> Set[str]:
+    return {token for texto in textos for token in re.findall(r"[a-z0-9]+", normalizar(texto))}
+
+
+def _sucesor(prefijo: str) -> str:
+    # Menor cadena mayor que todas las que empiezan por `prefijo`: el prefijo se
+    # consulta como rango [prefijo, sucesor) y así usa el índice en cualquier motor.
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def _prefijo(campo: str, prefijo: str) -> dict:
+    return {f"{campo}__gte": prefijo, f"{campo}__lt": _sucesor(prefijo)}
+
+
+def indexar_pacientes(filas: Iterable[Tuple], batch_size: int = 5000) -> int:
+    """
+    Reemplaza los tokens de búsqueda de los pacientes dados. `filas` son tuplas
+    (paciente_UUID, primer_nombre, segundo_nombre, primer_apellido, segundo_apellido).
+    Retorna la cantidad de tokens escritos.
+    """
+    filas = list(filas)
+    uuids = [fila[0] for fila in filas]
+    for i in range(0, len(uuids), batch_size):
+        Paciente_Busqueda.objects.filter(paciente_UUID__in=uuids[i:i + batch_size]).delete()
+    tokens = [
+        Paciente_Busqueda(paciente_UUID_id=fila[0], token=token[:60])
+        for fila in filas for token in tokenizar(*fila[1:])
+    ]
+    Paciente_Busqueda.objects.bulk_create(tokens, batch_size=batch_size, ignore_conflicts=True)
+    return len(tokens)
+
+
+def buscar_pacientes(queryset, consulta: str):
+    """
+    Filtra `queryset` (de Paciente) por la consulta, en orden de relevancia.
+    - Un solo término con dígitos: número de documento exacto o por prefijo.
+    - Si no, cada término es prefijo de algún nombre del paciente.
+    El orden sale del propio índice: el documento exacto o el token exacto del
+    término más selectivo quedan antes que las coincidencias por prefijo, así el
+    motor recorre el rango en orden y se detiene en el LIMIT de la página, sin
+    ordenar todos los candidatos ni usar icontains sobre las columnas de nombre.
+    """
+    terminos = consulta.split()
+    if len(terminos) == 1 and any(c.isdigit() for c in terminos[0]):
+        return queryset.filter(**_prefijo("numero_documento", terminos[0])).order_by("numero_documento")
+
+    tokens = sorted((t for t in tokenizar(consulta) if len(t) >= TOKEN_MINIMO), key=len, reverse=True)
+    if not tokens:
+        return queryset.none()
+    if len(tokens) > 1:
+        # Conteo acotado por término (solo índice) para que el rango más corto sea el que se recorre
+        tokens.sort(key=lambda t: Paciente_Busqueda.objects.filter(**_prefijo("token", t))[:MUESTRA_SELECTIVIDAD].count())
+
+    # El término más selectivo recorre busqueda_token_idx; de cada paciente
+    # solo cuenta su menor token dentro del rango, para que aparezca una sola vez.
+    principal = tokens[0]
+    queryset = queryset.filter(**_prefijo("tokens_rel__token", principal)).annotate(
+        token_busqueda=F("tokens_rel__token"), paciente_busqueda=F("tokens_rel__paciente_UUID"),
+    ).exclude(
+        Exists(Paciente_Busqueda.objects.filter(
+            paciente_UUID=OuterRef("pk"), token__gte=principal, token__lt=OuterRef("token_busqueda")
+        ))
+    )
+    # Los demás términos se comprueban por paciente sobre la clave única (paciente_UUID, token)
+    for token in tokens[1:]:
+        queryset = queryset.filter(
+            Exists(Paciente_Busqueda.objects.filter(paciente_UUID=OuterRef("pk"), **_prefijo("token", token)))
+        )
+    # Desempate por la columna del índice (no por la PK de Paciente) para no ordenar en memoria
+    return queryset.order_by("token_busqueda", "paciente_busqueda")
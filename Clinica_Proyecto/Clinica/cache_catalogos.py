@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import (
+    Comunidad_Etnica, Diagnostico, Discapacidad, Enfermedad_Huerfana, Entidad_Prestadora_Salud, Etnia,
+    Modalidad_Realizacion_Tecnologia_Salud, Motivo_Atencion, Municipio, Ocupacion, Pais, Tipo_documento,
+    Version_Catalogos, Via_Ingreso_Servicio_Salud,
+)
+
+MODELOS_CATALOGO = (
+    Pais, Municipio, Ocupacion, Etnia, Comunidad_Etnica, Discapacidad, Tipo_documento, Entidad_Prestadora_Salud,
+    Modalidad_Realizacion_Tecnologia_Salud, Via_Ingreso_Servicio_Salud, Motivo_Atencion, Enfermedad_Huerfana,
+    Diagnostico,
+)
+# Segundos entre lecturas del contador global: es lo más que tarda un proceso en ver un
+# cambio hecho por otro (import_maestros, otro worker).
+VERIFICAR_CADA = 2.0
+
+
+def version_global() -> int:
+    return Version_Catalogos.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+def incrementar_version():
+    """Avanza el contador global; cada proceso descarta su caché en su próxima verificación."""
+    if Version_Catalogos.objects.filter(pk=1).update(version=F("version") + 1):
+        return
+    try:
+        with transaction.atomic():
+            Version_Catalogos.objects.create(pk=1, version=1)
+    except IntegrityError:
+        # Otro proceso creó la fila al mismo tiempo
+        Version_Catalogos.objects.filter(pk=1).update(version=F("version") + 1)
+
+
+class CacheCatalogos:
+    """
+    Caché de lectura de los catálogos para este proceso: cada tabla se carga
+    completa (una consulta) la primera vez que se pide y se sirve desde memoria
+    mientras el contador global no cambie.
+    """
+
+    def __init__(self):
+        self._tablas: Dict[type, Dict] = {}
+        self._version = None
+        self._verificado = 0.0
+        self._lock = threading.Lock()
+        self.aciertos = Counter()
+        self.fallos = Counter()
+
+    def version(self) -> int:
+        if time.monotonic() - self._verificado >= VERIFICAR_CADA:
+            actual = version_global()
+            with self._lock:
+                if actual != self._version:
+                    self._tablas.clear()
+                    self._version = actual
+                self._verificado = time.monotonic()
+        return self._version
+
+    def tabla(self, model) -> Dict:
+        """Filas del catálogo por PK, en el orden del modelo."""
+        self.version()
+        filas = self._tablas.get(model)
+        if filas is not None:
+            self.aciertos[model.__name__] += 1
+            return filas
+        with self._lock:
+            filas = self._tablas.get(model)
+            if filas is None:
+                self.fallos[model.__name__] += 1
+                filas = self._tablas[model] = {obj.pk: obj for obj in model.objects.all()}
+            else:
+                self.aciertos[model.__name__] += 1
+        return filas
+
+    def obtener(self, model, pk):
+        """Fila del catálogo con esa PK, o None si no existe."""
+        return self.tabla(model).get(pk)
+
+    def resolver(self, objs: Iterable, *campos: str):
+        """
+        Asigna a cada objeto los catálogos de sus FKs `campos` desde la caché,
+        así la plantilla no dispara una consulta por relación.
+        """
+        for obj in objs:
+            for campo in campos:
+                field = obj._meta.get_field(campo)
+                pk = getattr(obj, field.attname)
+                if pk is not None:
+                    field.set_cached_value(obj, self.obtener(field.related_model, pk))
+
+    def invalidar(self):
+        """Incrementa el contador global y descarta ya la caché de este proceso."""
+        incrementar_version()
+        with self._lock:
+            self._tablas.clear()
+            self._verificado = 0.0
+
+    def estadisticas(self) -> Dict:
+        return {
+            "version": self._version,
+            "tablas_cargadas": sorted(model.__name__ for model in self._tablas),
+            "aciertos": dict(self.aciertos),
+            "fallos": dict(self.fallos),
+        }
+
+
+catalogos = CacheCatalogos()
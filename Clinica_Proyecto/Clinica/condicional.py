@@ -0,0 +1,80 @@
+import uuid
+from functools import wraps
+from typing import Iterable, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache_catalogos import catalogos
+from .models import Paciente
+
+
+def tocar_pacientes(pacientes: Iterable, batch_size: int = 1000):
+    """
+    Marca a `pacientes` (UUID) como modificados ahora. Para las escrituras en
+    filas relacionadas (vínculos, voluntad, oposición, contactos); el save() del
+    paciente ya actualiza fecha_actualizacion por sí solo.
+    """
+    pacientes = list({uuid.UUID(str(p)) for p in pacientes})
+    ahora = timezone.now()
+    for inicio in range(0, len(pacientes), batch_size):
+        Paciente.objects.filter(pk__in=pacientes[inicio:inicio + batch_size]).update(fecha_actualizacion=ahora)
+
+
+def validadores_paciente(request, id_paciente) -> Tuple[Optional[str], Optional[int]]:
+    """
+    (ETag, Last-Modified) de las páginas del paciente con una consulta por PK,
+    o (None, None) si no existe.
+    """
+    try:
+        id_paciente = uuid.UUID(str(id_paciente))
+    except ValueError:
+        return None, None
+    fecha = Paciente.objects.filter(pk=id_paciente).values_list("fecha_actualizacion", flat=True).first()
+    if fecha is None:
+        return None, None
+    # Las páginas también muestran nombres de catálogos y el usuario de la sesión
+    etag = quote_etag(f"{fecha.timestamp():.6f}-{catalogos.version()}-{request.user.pk}")
+    return etag, int(fecha.timestamp())
+
+
+def _completar(request, respuesta, etag, modificado):
+    if request.method in ("GET", "HEAD") and etag:
+        respuesta.headers.setdefault("ETag", etag)
+        respuesta.headers.setdefault("Last-Modified", http_date(modificado))
+    # El navegador guarda la página pero la revalida siempre; nunca en cachés compartidas
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
+
+
+def condicional_paciente(argumento: str):
+    """
+    GET condicional para las páginas de un paciente (su UUID llega en el
+    argumento `argumento` de la URL): si el navegador ya tiene la versión
+    actual se responde 304 sin ejecutar la vista, es decir sin plantillas ni
+    más consultas. Como django.views.decorators.http.condition pero con una
+    sola consulta para ambos validadores, y en un hilo para las vistas async.
+    """
+    def decorador(vista):
+        def antes(request, kwargs):
+            etag, modificado = validadores_paciente(request, kwargs[argumento])
+            return etag, modificado, get_conditional_response(request, etag=etag, last_modified=modificado)
+
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura(request, *args, **kwargs):
+                etag, modificado, respuesta = await sync_to_async(antes)(request, kwargs)
+                if respuesta is None:
+                    respuesta = await vista(request, *args, **kwargs)
+                return _completar(request, respuesta, etag, modificado)
+        else:
+            @wraps(vista)
+            def envoltura(request, *args, **kwargs):
+                etag, modificado, respuesta = antes(request, kwargs)
+                if respuesta is None:
+                    respuesta = vista(request, *args, **kwargs)
+                return _completar(request, respuesta, etag, modificado)
+        return envoltura
+    return decorador
@@ -1,6 +1,100 @@
 from django import forms
+from django.urls import reverse
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.forms.models import ModelChoiceIterator
+from .autocompletar import indice
+from .cache_catalogos import catalogos
 from .models import Paciente, Voluntad_Anticipada, Oposicion_Donacion, Pais, Discapacidad, Contacto_Servicio_Salud
 
+class CatalogoChoiceIterator(ModelChoiceIterator):
+    # Opciones desde la caché de catálogos en lugar de consultar el queryset en cada render
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in catalogos.tabla(self.queryset.model).values():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(catalogos.tabla(self.queryset.model)) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(catalogos.tabla(self.queryset.model))
+
+def _desde_cache(field, value):
+    model = field.queryset.model
+    if isinstance(value, model):
+        value = value.pk
+    try:
+        obj = catalogos.obtener(model, model._meta.pk.to_python(value))
+    except ValidationError:
+        obj = None
+    if obj is None:
+        raise ValidationError(field.error_messages["invalid_choice"], code="invalid_choice", params={"value": value})
+    return obj
+
+class CatalogoChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField de un catálogo completo que resuelve y valida el código
+    contra la caché de catálogos, sin consultar la base de datos.
+    """
+    iterator = CatalogoChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        return _desde_cache(self, value)
+
+class CatalogoMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """Versión de selección múltiple de CatalogoChoiceField."""
+    iterator = CatalogoChoiceIterator
+
+    def _check_values(self, value):
+        try:
+            value = frozenset(value)
+        except TypeError:
+            raise ValidationError(self.error_messages["invalid_list"], code="invalid_list")
+        return [_desde_cache(self, pk) for pk in value]
+
+# FKs a catálogos de cada formulario (Meta.field_classes)
+CATALOGOS_PACIENTE = {
+    campo: CatalogoChoiceField
+    for campo in ('tipo_documento', 'residencia', 'ocupacion', 'etnia', 'comunidad_Etnica', 'entidad_prestadora_salud')
+}
+CATALOGOS_VOLUNTAD = {'codigo_entidad_prestadora': CatalogoChoiceField}
+CATALOGOS_CONTACTO = {
+    campo: CatalogoChoiceField
+    for campo in (
+        'codigo_entidad_prestadora', 'codigo_modalidad_realizacion_tecnologia_salud',
+        'codigo_via_ingreso_usuario_servicio_salud', 'codigo_causa_motivo_atencion',
+        'codigo_diagnostico', 'codigo_enfermedad_huerfana',
+    )
+}
+
+class AutocompletarWidget(forms.TextInput):
+    """
+    Campo de texto con sugerencias de catalogo_autocompletar en lugar de un
+    <select> con todo el catálogo: el formulario envía solo el código elegido.
+    """
+    template_name = "widgets/autocompletar.html"
+
+    def __init__(self, catalogo, attrs=None):
+        super().__init__(attrs)
+        self.catalogo = catalogo
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget = context["widget"]
+        widget["attrs"].update({
+            "list": f"{widget['attrs'].get('id', name)}_opciones",
+            "autocomplete": "off",
+            "data-autocompletar": reverse("catalogo_autocompletar", args=[self.catalogo]),
+        })
+        # Nombre del código actual (al editar), resuelto en el índice en memoria
+        widget["etiqueta"] = indice(self.catalogo).nombres.get(widget["value"]) if widget["value"] else None
+        return context
+
+
 class FormPaciente(forms.ModelForm):    
     fecha_nacimiento = forms.DateTimeField(
         widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}),
@@ -24,8 +118,45 @@ class FormPaciente(forms.ModelForm):
             'residencia', 'ocupacion', 'etnia',
             'comunidad_Etnica', 'entidad_prestadora_salud'
         ]
+        field_classes = CATALOGOS_PACIENTE
+        widgets = {
+            'residencia': AutocompletarWidget("municipio"),
+            'ocupacion': AutocompletarWidget("ocupacion"),
+        }
+
+class FormVersionado(forms.ModelForm):
+    """
+    Formulario de edición con bloqueo optimista: lleva oculta la versión de la
+    fila que se leyó al abrirlo y reservar_version() solo deja guardar si la
+    fila sigue en esa versión.
+    """
+    MENSAJE_CONFLICTO = ("Otro usuario guardó cambios en este registro mientras lo editabas. "
+                         "Abre de nuevo el formulario para ver la versión actual y vuelve a aplicar tus cambios.")
+
+    version = forms.IntegerField(widget=forms.HiddenInput, min_value=0)
 
-class FormPacienteEdit(forms.ModelForm):    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["version"].initial = self.instance.version
+        self.conflicto = False
+
+    def reservar_version(self) -> bool:
+        """
+        UPDATE ... SET version = version + 1 WHERE pk = ... AND version = n, con
+        n la versión del formulario. Si ninguna fila cambia, otra edición ganó:
+        agrega el error y retorna False. Si no, la fila queda bloqueada hasta el
+        fin de la transacción y el save() que sigue lleva la nueva versión.
+        """
+        version = self.cleaned_data["version"]
+        model = type(self.instance)
+        if not model.objects.filter(pk=self.instance.pk, version=version).update(version=F("version") + 1):
+            self.conflicto = True
+            self.add_error(None, self.MENSAJE_CONFLICTO)
+            return False
+        self.instance.version = version + 1
+        return True
+
+class FormPacienteEdit(FormVersionado):
     segundo_nombre = forms.CharField(
         required=False,
     )
@@ -43,9 +174,14 @@ class FormPacienteEdit(forms.ModelForm):
             'residencia', 'ocupacion', 'etnia',
             'comunidad_Etnica', 'entidad_prestadora_salud'
         ]
+        field_classes = CATALOGOS_PACIENTE
+        widgets = {
+            'residencia': AutocompletarWidget("municipio"),
+            'ocupacion': AutocompletarWidget("ocupacion"),
+        }
 
 class FormNacionalidad(forms.Form):
-    paises = forms.ModelMultipleChoiceField(
+    paises = CatalogoMultipleChoiceField(
         queryset=Pais.objects.all(),
         widget=forms.CheckboxSelectMultiple,
         required=False,
@@ -53,7 +189,7 @@ class FormNacionalidad(forms.Form):
     )
 
 class FormDiscapacidad(forms.Form):
-    discapacidades = forms.ModelMultipleChoiceField(
+    discapacidades = CatalogoMultipleChoiceField(
         queryset=Discapacidad.objects.all(),
         widget=forms.CheckboxSelectMultiple,
         required=False,
@@ -70,6 +206,7 @@ class FormVoluntadAnticipada(forms.ModelForm):
     class Meta:
         model = Voluntad_Anticipada
         fields = ['documento_voluntad_anticipada', 'fecha_suscripcion_documento', 'codigo_entidad_prestadora']
+        field_classes = CATALOGOS_VOLUNTAD
         labels = {
             'documento_voluntad_anticipada': "¿Existe Voluntad Anticipada?",
             'fecha_suscripcion_documento': "Fecha de Documento",
@@ -96,6 +233,7 @@ class FormVoluntadAnticipadaEdit(forms.ModelForm):
     class Meta:
         model = Voluntad_Anticipada
         fields = ['documento_voluntad_anticipada', 'fecha_suscripcion_documento', 'codigo_entidad_prestadora']
+        field_classes = CATALOGOS_VOLUNTAD
         labels = {
             'documento_voluntad_anticipada': "¿Existe Voluntad Anticipada?",
             'fecha_suscripcion_documento': "Fecha de Documento",
@@ -153,14 +291,17 @@ class FormContactoSalud(forms.ModelForm):
             'tipo_diagnostico': 'Tipo de Diagnóstico',
         }
 
+        field_classes = CATALOGOS_CONTACTO
         widgets = {
+            'codigo_diagnostico': AutocompletarWidget("diagnostico", attrs={'class': 'form-control'}),
+            'codigo_enfermedad_huerfana': AutocompletarWidget("enfermedad_huerfana", attrs={'class': 'form-control'}),
             'grupo_servicios': forms.Select(attrs={'class': 'form-control'}),
             'entorno_atencion': forms.Select(attrs={'class': 'form-control'}),
             'clasificacion_triage': forms.Select(attrs={'class': 'form-control'}),
             'tipo_diagnostico': forms.Select(attrs={'class': 'form-control'}),
         }
 
-class FormContactoSaludEdit(forms.ModelForm):
+class FormContactoSaludEdit(FormVersionado):
 
     class Meta:
         model = Contacto_Servicio_Salud
@@ -191,9 +332,24 @@ class FormContactoSaludEdit(forms.ModelForm):
             'tipo_diagnostico': 'Tipo de Diagnóstico',
         }
 
+        field_classes = CATALOGOS_CONTACTO
         widgets = {
+            'codigo_diagnostico': AutocompletarWidget("diagnostico", attrs={'class': 'form-control'}),
+            'codigo_enfermedad_huerfana': AutocompletarWidget("enfermedad_huerfana", attrs={'class': 'form-control'}),
             'grupo_servicios': forms.Select(attrs={'class': 'form-control'}),
             'entorno_atencion': forms.Select(attrs={'class': 'form-control'}),
             'clasificacion_triage': forms.Select(attrs={'class': 'form-control'}),
             'tipo_diagnostico': forms.Select(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+class FormRangoFechas(forms.Form):
+    desde = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date'}),
+        required=False,
+        label="Desde"
+    )
+    hasta = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date'}),
+        required=False,
+        label="Hasta"
+    )
@@ -0,0 +1,256 @@
+# Clinica/management/commands/benchmark_import.py
+import csv
+import json
+import random
+import tempfile
+import time
+import uuid
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from Clinica.models import Paciente
+from Clinica.management.commands.import_maestros import (
+    ARCHIVOS_CATALOGOS, CATALOGOS, CONTACTO_CHOICES, CONTACTO_FKS, DATA_DIR, PACIENTE_FKS, read_table
+)
+
+# Espacio de nombres para derivar el UUID del paciente i sin guardarlos en memoria
+NAMESPACE_BENCHMARK = uuid.UUID("6f1c1d0e-8d8e-4f7a-9a51-2f6b0f3c9b10")
+
+NOMBRES = ["Ana", "Luis", "María", "José", "Camila", "Andrés", "Sofía", "Juan", "Valentina", "Óscar"]
+APELLIDOS = ["Gómez", "Rodríguez", "Pérez", "Núñez", "Martínez", "López", "Zapata", "Peñuela", "Giraldo", "Muñoz"]
+
+# -------- Datos sintéticos -------- #
+
+def parse_size(value: str) -> int:
+    """Acepta 10000, 10k, 100K, 1M."""
+    value = value.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    digits = value[:-1] if factor > 1 else value
+    try:
+        return int(float(digits) * factor)
+    except ValueError:
+        raise CommandError(f"Tamaño inválido: {value}")
+
+def paciente_uuid(index: int) -> str:
+    return str(uuid.uuid5(NAMESPACE_BENCHMARK, str(index)))
+
+def catalog_codes() -> Dict[str, List[str]]:
+    """Códigos reales de cada catálogo, leídos de Clinica/data."""
+    codes = {}
+    for label, filename in ARCHIVOS_CATALOGOS.items():
+        key = CATALOGOS[label][2]
+        codes[label] = sorted(set(read_table(str(DATA_DIR / filename))[key]))
+    return codes
+
+def generate_files(out_dir: Path, rows: int, seed: int = 0) -> Dict[str, Path]:
+    """
+    Escribe paciente, paciente_pais, paciente_discapacidad y contacto en CSV con
+    `rows` filas cada uno (paciente_discapacidad: la mitad). Las filas se escriben
+    en streaming y los UUID de paciente se derivan del índice, así generar 1M de
+    filas no ocupa memoria proporcional al tamaño.
+    """
+    rng = random.Random(seed)
+    codes = catalog_codes()
+    fk_catalog = {  # columna del archivo -> catálogo (label) cuyos códigos usa
+        "tipo_documento": "tipo_documento",
+        "residencia": "municipio",
+        "ocupacion": "ocupacion",
+        "etnia": "etnia",
+        "comunidad_Etnica": "comunidad_etnica",
+        "entidad_prestadora_salud": "entidad_prestadora_salud",
+        "codigo_entidad_prestadora": "entidad_prestadora_salud",
+        "codigo_modalidad_realizacion_tecnologia_salud": "modalidad_realizacion_tecnologia_salud",
+        "codigo_via_ingreso_usuario_servicio_salud": "via_ingreso_servicio_salud",
+        "codigo_causa_motivo_atencion": "motivo_atencion",
+        "codigo_diagnostico": "diagnostico",
+        "codigo_enfermedad_huerfana": "enfermedad_huerfana",
+    }
+    choices = {
+        "sexo_biologico": [c for c, _ in Paciente.SEXO_BIOLOGICO_CHOICES],
+        "identidad_genero": [c for c, _ in Paciente.IDENTIDAD_GENERO_CHOICES],
+        "zona_territorial_residencia": [c for c, _ in Paciente.ZONA_TERRITORIAL_RESIDENCIAL_CHOICES],
+        **{col: [c for c, _ in options] for col, options in CONTACTO_CHOICES.items()},
+    }
+
+    def pick(col):
+        return rng.choice(codes[fk_catalog[col]] if col in fk_catalog else choices[col])
+
+    def fecha(start_year, end_year):
+        return (f"{rng.randint(start_year, end_year)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}")
+
+    paths = {name: out_dir / f"{name}.csv" for name in ("paciente", "paciente_pais", "paciente_discapacidad", "contacto")}
+
+    with paths["paciente"].open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["paciente_UUID", "numero_documento", "primer_nombre", "segundo_nombre",
+                         "primer_apellido", "segundo_apellido", "fecha_nacimiento",
+                         "sexo_biologico", "identidad_genero", "zona_territorial_residencia", *PACIENTE_FKS])
+        for i in range(rows):
+            writer.writerow([
+                paciente_uuid(i), str(10_000_000 + i),
+                rng.choice(NOMBRES), rng.choice(NOMBRES + [""]),
+                rng.choice(APELLIDOS), rng.choice(APELLIDOS + [""]),
+                fecha(1930, 2024),
+                pick("sexo_biologico"), pick("identidad_genero"), pick("zona_territorial_residencia"),
+                *[pick(col) if col != "comunidad_Etnica" or rng.random() < 0.1 else "" for col in PACIENTE_FKS],
+            ])
+
+    with paths["paciente_pais"].open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["paciente_UUID", "codigo_pais"])
+        for i in range(rows):
+            writer.writerow([paciente_uuid(i), rng.choice(codes["pais"])])
+
+    with paths["paciente_discapacidad"].open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["paciente_UUID", "id_discapacidad"])
+        for i in range(0, rows, 2):
+            writer.writerow([paciente_uuid(i), rng.choice(codes["discapacidad"])])
+
+    with paths["contacto"].open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["paciente_UUID", "fecha_hora_inicio_atencion", "fecha_hora_triage",
+                         *CONTACTO_CHOICES, *CONTACTO_FKS])
+        for _ in range(rows):
+            inicio = fecha(2020, 2025)
+            writer.writerow([
+                paciente_uuid(rng.randrange(rows)), inicio, inicio,
+                *[pick(col) for col in CONTACTO_CHOICES],
+                *[pick(col) if col != "codigo_enfermedad_huerfana" or rng.random() < 0.05 else "" for col in CONTACTO_FKS],
+            ])
+    return paths
+
+# -------- Medición -------- #
+
+def reset_peak_rss():
+    """Reinicia el pico de RSS del proceso (Linux); en otros sistemas no hace nada."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+def peak_rss_mb():
+    """Pico de RSS (VmHWM) en MB; None si el sistema no lo expone."""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+class QueryCounter:
+    """execute_wrapper que cuenta las sentencias enviadas por la conexión."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+def use_sqlite(path: Path):
+    """Redirige la conexión default a una base SQLite desechable."""
+    connections.close_all()
+    settings.DATABASES["default"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path)}
+    connections.__dict__.pop("settings", None)  # ConnectionHandler.settings es cached_property
+    del connections["default"]
+
+
+class Command(BaseCommand):
+    help = ("Mide el rendimiento de import_maestros con datos sintéticos (códigos reales de Clinica/data) "
+            "sobre una base desechable y reporta filas/s, pico de RSS y consultas por etapa en JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", default=["10k"],
+                            help="Filas por archivo sintético, p. ej. 10k 100k 1M (default: 10k)")
+        parser.add_argument("--sqlite", action="store_true",
+                            help="Usa una base SQLite temporal en lugar de la base de pruebas del motor configurado")
+        parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos sintéticos")
+        parser.add_argument("--chunk", type=int, default=50000, help="Se pasa a import_maestros --chunk")
+        parser.add_argument("--batch", type=int, default=1000, help="Se pasa a import_maestros --batch")
+        parser.add_argument("--fast", action="store_true", help="Se pasa a import_maestros --fast")
+        parser.add_argument("--keep-files", type=str, help="Directorio donde dejar los archivos generados")
+        parser.add_argument("--output", type=str, help="Archivo JSON de salida (por defecto stdout)")
+
+    def handle(self, *args, **opts):
+        sizes = [parse_size(v) for v in opts["sizes"]]
+        results = []
+        with tempfile.TemporaryDirectory(prefix="clinica_bench_") as tmp:
+            tmp = Path(tmp)
+            for rows in sizes:
+                out_dir = Path(opts["keep_files"]) / str(rows) if opts["keep_files"] else tmp / str(rows)
+                out_dir.mkdir(parents=True, exist_ok=True)
+                self.stderr.write(f"Generando {rows} filas sintéticas en {out_dir} ...")
+                files = generate_files(out_dir, rows, opts["seed"])
+                results.append(self.run_size(rows, files, tmp / f"bench_{rows}.sqlite3", opts))
+
+        report = json.dumps({"results": results}, indent=2, ensure_ascii=False)
+        if opts["output"]:
+            Path(opts["output"]).write_text(report, encoding="utf-8")
+        else:
+            self.stdout.write(report)
+
+    def run_size(self, rows, files, sqlite_path, opts):
+        old_name = None
+        if opts["sqlite"]:
+            use_sqlite(sqlite_path)
+            call_command("migrate", run_syncdb=True, verbosity=0)
+        else:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        catalog_args = []
+        catalog_rows = 0
+        for label, filename in ARCHIVOS_CATALOGOS.items():
+            catalog_args += [f"--{CATALOGOS[label][0]}", str(DATA_DIR / filename)]
+            catalog_rows += len(read_table(str(DATA_DIR / filename)))
+
+        stages = [
+            ("catalogos", catalog_rows, catalog_args),
+            ("paciente", rows, ["--paciente", str(files["paciente"])]),
+            ("paciente_pais", rows, ["--paciente_pais", str(files["paciente_pais"])]),
+            ("paciente_discapacidad", (rows + 1) // 2, ["--paciente_discapacidad", str(files["paciente_discapacidad"])]),
+            ("contacto", rows, ["--contacto", str(files["contacto"])]),
+        ]
+        try:
+            results = {
+                "rows": rows,
+                "backend": connection.vendor,
+                "fast": opts["fast"],
+                "stages": [self.run_stage(name, count, args, opts) for name, count, args in stages],
+            }
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        return results
+
+    def run_stage(self, name, rows, args, opts):
+        self.stderr.write(f"  [{rows}] {name} ...")
+        counter = QueryCounter()
+        reset_peak_rss()
+        start = time.perf_counter()
+        if opts["fast"]:
+            args = [*args, "--fast"]
+        with connection.execute_wrapper(counter):
+            call_command("import_maestros", *args, "--chunk", str(opts["chunk"]), "--batch", str(opts["batch"]),
+                         stdout=StringIO())
+        seconds = time.perf_counter() - start
+        return {
+            "stage": name,
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "queries": counter.count,
+        }
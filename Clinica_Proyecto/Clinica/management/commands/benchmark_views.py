@@ -0,0 +1,164 @@
+# Clinica/management/commands/benchmark_views.py
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from importlib import import_module
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from Clinica.models import Contacto_Servicio_Salud
+
+# Vistas de lectura medidas (las que tienen versión async)
+VISTAS = ("paciente_list", "paciente_detail", "contacto_salud_list", "contacto_salud_details")
+
+
+def sample_paths(pacientes: int) -> List[Tuple[str, str]]:
+    """(vista, ruta) de cada vista para `pacientes` pacientes con contactos, tomados de la base."""
+    pares = Contacto_Servicio_Salud.objects.order_by("paciente_UUID").values_list(
+        "paciente_UUID", "id_contacto_UUID")[:pacientes * 20]
+    vistos = {}
+    for paciente, contacto in pares:
+        vistos.setdefault(paciente, contacto)
+        if len(vistos) == pacientes:
+            break
+    if not vistos:
+        raise CommandError("La base no tiene contactos de salud; importa datos primero (import_maestros)")
+
+    paths = []
+    for paciente, contacto in vistos.items():
+        paths += [
+            ("paciente_list", reverse("paciente_list")),
+            ("paciente_detail", reverse("paciente_detail", args=[paciente])),
+            ("contacto_salud_list", reverse("contacto_salud_list", args=[paciente])),
+            ("contacto_salud_details", reverse("contacto_salud_details", args=[paciente, contacto])),
+        ]
+    return paths
+
+
+def session_cookie(username: str) -> str:
+    """Crea una sesión autenticada para `username` (misma base que el servidor) y devuelve la cookie."""
+    try:
+        user = get_user_model().objects.get(username=username)
+    except get_user_model().DoesNotExist:
+        raise CommandError(f"No existe el usuario {username}")
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    store[SESSION_KEY] = str(user.pk)
+    store[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.create()
+    return f"{settings.SESSION_COOKIE_NAME}={store.session_key}"
+
+
+def run_load(base_url: str, paths: List[Tuple[str, str]], cookie: str, concurrency: int, seconds: float,
+             warmup: float) -> Dict:
+    """
+    `concurrency` hilos con conexión keep-alive piden las rutas en ronda durante
+    `seconds` (tras `warmup` segundos sin medir). Devuelve peticiones/s y
+    latencias por vista.
+    """
+    url = urlsplit(base_url)
+    latencias: Dict[str, List[float]] = defaultdict(list)
+    errores = Counter()
+    lock = threading.Lock()
+    inicio_medicion = time.perf_counter() + warmup
+    fin = inicio_medicion + seconds
+
+    def worker(offset):
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        propias = defaultdict(list)
+        fallos = Counter()
+        i = offset
+        while True:
+            vista, path = paths[i % len(paths)]
+            i += 1
+            t0 = time.perf_counter()
+            if t0 >= fin:
+                break
+            try:
+                conn.request("GET", path, headers={"Cookie": cookie, "Host": url.netloc})
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+                ok = False
+            t1 = time.perf_counter()
+            if t0 >= inicio_medicion:
+                if ok:
+                    propias[vista].append(t1 - t0)
+                else:
+                    fallos[vista] += 1
+        conn.close()
+        with lock:
+            for vista, valores in propias.items():
+                latencias[vista].extend(valores)
+            errores.update(fallos)
+
+    hilos = [threading.Thread(target=worker, args=(n * 7,)) for n in range(concurrency)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    def resumen(valores):
+        if not valores:
+            return {"requests": 0}
+        valores = sorted(valores)
+        return {
+            "requests": len(valores),
+            "req_per_sec": round(len(valores) / seconds, 1),
+            "p50_ms": round(statistics.median(valores) * 1000, 2),
+            "p95_ms": round(valores[int(len(valores) * 0.95) - 1] * 1000, 2),
+        }
+
+    todas = [v for valores in latencias.values() for v in valores]
+    return {
+        "url": base_url,
+        "concurrency": concurrency,
+        "seconds": seconds,
+        **resumen(todas),
+        "errors": sum(errores.values()),
+        "views": {vista: {**resumen(latencias[vista]), "errors": errores[vista]} for vista in VISTAS},
+    }
+
+
+class Command(BaseCommand):
+    help = ("Mide peticiones/s y latencias de las vistas de lectura (listado y detalle de pacientes y contactos) "
+            "contra servidores ya levantados, p. ej. uvicorn (ASGI) y gunicorn (WSGI), a la misma concurrencia.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+",
+                            help="URL base de cada servidor, p. ej. http://127.0.0.1:8001 http://127.0.0.1:8002")
+        parser.add_argument("--usuario", required=True, help="Usuario existente con el que se crea la sesión")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[16],
+                            help="Conexiones simultáneas; con varios valores se mide cada uno (default: 16)")
+        parser.add_argument("--seconds", type=float, default=20, help="Duración de cada medición (default: 20)")
+        parser.add_argument("--warmup", type=float, default=3, help="Segundos previos sin medir (default: 3)")
+        parser.add_argument("--pacientes", type=int, default=200, help="Pacientes distintos a recorrer (default: 200)")
+        parser.add_argument("--output", type=str, help="Archivo JSON de salida (por defecto stdout)")
+
+    def handle(self, *args, **opts):
+        paths = sample_paths(opts["pacientes"])
+        cookie = session_cookie(opts["usuario"])
+        results = []
+        for concurrency in opts["concurrency"]:
+            for base_url in opts["urls"]:
+                self.stderr.write(f"  {base_url} concurrencia={concurrency} ...")
+                results.append(run_load(base_url.rstrip("/"), paths, cookie, concurrency, opts["seconds"],
+                                        opts["warmup"]))
+
+        report = json.dumps({"results": results}, indent=2, ensure_ascii=False)
+        if opts["output"]:
+            Path(opts["output"]).write_text(report, encoding="utf-8")
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,84 @@
+# Clinica/management/commands/build_catalog_snapshot.py
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Clinica.management.commands.import_maestros import (
+    ARCHIVOS_CATALOGOS, CATALOGOS, DATA_DIR, ensure_columns, read_table, validate_columns
+)
+
+# Versión del formato del artefacto; cambia si cambia su estructura
+FORMATO_SNAPSHOT = 1
+SNAPSHOT_DEFAULT = DATA_DIR / "catalogos.snapshot.json.gz"
+
+def table_hash(columns: List[str], rows: List[List[str]]) -> str:
+    """SHA-256 del contenido canónico de una tabla (columnas + filas ordenadas por clave)."""
+    payload = json.dumps([columns, rows], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_table(label: str, path: Path) -> Dict[str, Any]:
+    """
+    Lee el archivo del catálogo, lo valida como import_maestros y deja una fila
+    por clave (gana la última, igual que en la carga), ordenadas por clave.
+    """
+    _, model, key, fields_map = CATALOGOS[label]
+    columns = [key, *fields_map]
+    df = read_table(str(path))
+    ensure_columns(df.columns, columns, label)
+    df = validate_columns(label, df[columns], model, columns, strict=False)
+    df = df.drop_duplicates(subset=[key], keep="last").sort_values(key)
+    rows = df.values.tolist()
+    return {
+        "modelo": model._meta.label,
+        "columnas": columns,
+        "hash": table_hash(columns, rows),
+        "filas": rows,
+    }
+
+def read_snapshot(path_str: str) -> Dict[str, Any]:
+    path = Path(path_str)
+    if not path.exists():
+        raise CommandError(f"Snapshot no existe: {path}. Genéralo con build_catalog_snapshot.")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("formato") != FORMATO_SNAPSHOT:
+        raise CommandError(f"Formato de snapshot {snapshot.get('formato')} no soportado (se espera {FORMATO_SNAPSHOT}).")
+    return snapshot
+
+
+class Command(BaseCommand):
+    help = ("Compila los 13 catálogos de Clinica/data en un snapshot versionado (JSON comprimido con gzip) "
+            "con hash de contenido por tabla, para cargarlo con load_catalog_snapshot.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data-dir", type=str, default=str(DATA_DIR),
+                            help="Directorio con los archivos de catálogo (default: Clinica/data)")
+        parser.add_argument("--output", type=str, default=str(SNAPSHOT_DEFAULT),
+                            help="Archivo de salida (default: Clinica/data/catalogos.snapshot.json.gz)")
+
+    def handle(self, *args, **opts):
+        data_dir = Path(opts["data_dir"])
+        tablas = {}
+        for label, filename in ARCHIVOS_CATALOGOS.items():
+            tablas[label] = build_table(label, data_dir / filename)
+            self.stdout.write(f"[{label}] filas={len(tablas[label]['filas'])} hash={tablas[label]['hash'][:12]}")
+
+        # La versión del snapshot depende solo del contenido: recompilar sin cambios da la misma versión
+        version = hashlib.sha256("".join(t["hash"] for t in tablas.values()).encode("utf-8")).hexdigest()
+        snapshot = {
+            "formato": FORMATO_SNAPSHOT,
+            "version": version,
+            "tablas": tablas,
+        }
+        output = Path(opts["output"])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        # mtime=0 y sin nombre de archivo en la cabecera para que el .gz sea reproducible byte a byte
+        with open(output, "wb") as raw, gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) as gz:
+            gz.write(json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {version[:12]} -> {output} ({output.stat().st_size / 1024:.0f} KB)"
+        ))
@@ -1,151 +1,1383 @@
 # tu_app/management/commands/import_maestros.py
+import cProfile
+import hashlib
+import io
 import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial, wraps
 from pathlib import Path
-from typing import Iterable, Dict, Any, Tuple
+from typing import Iterable, Iterator, Dict, Any, List, Tuple
 
+import numpy as np
 import pandas as pd
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from django.utils.timezone import now
+from django.core.validators import MinLengthValidator, RegexValidator
+from django.db import DatabaseError, connection, models, transaction
+from django.utils.timezone import get_current_timezone, now
 
+from Clinica.busqueda import CAMPOS_NOMBRE, indexar_pacientes, normalizar
+from Clinica.cache_catalogos import catalogos
+from Clinica.condicional import tocar_pacientes
+from Clinica.perfil_paciente import invalidar_perfiles
+from Clinica.vinculos import diferencia_vinculos, sincronizar_vinculos
 from Clinica.models import (
     Pais, Municipio, Ocupacion, Etnia, Comunidad_Etnica, Discapacidad,
     Tipo_documento, Entidad_Prestadora_Salud,
     Modalidad_Realizacion_Tecnologia_Salud, Via_Ingreso_Servicio_Salud,
-    Motivo_Atencion, Enfermedad_Huerfana, Diagnostico, Paciente, Paciente_Pais, Paciente_Discapacidad
+    Motivo_Atencion, Enfermedad_Huerfana, Diagnostico, Paciente, Paciente_Pais, Paciente_Discapacidad,
+    Contacto_Servicio_Salud, Manifiesto_Importacion, Manifiesto_Fila, Checkpoint_Importacion
 )
 
+# -------- Perfilado (--profile) -------- #
+
+class LoadProfile:
+    """
+    Métricas de una carga: segundos por fase, consultas, filas y memoria pico.
+    Las particiones de una misma carga (workers) suman sobre el mismo objeto.
+    """
+    PHASES = ("lectura", "normalizacion", "validacion", "fks", "escritura")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.seconds = Counter()
+        self.queries = 0
+        self.rows = 0
+        self.elapsed = 0.0
+        self.peak = None
+        self._lock = threading.Lock()
+
+    def add(self, phase_name: str, seconds: float):
+        with self._lock:
+            self.seconds[phase_name] += seconds
+
+    def count_query(self, execute, sql, params, many, context):
+        with self._lock:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+_profiling = threading.local()
+
+@contextmanager
+def phase(name: str):
+    """
+    Acumula el tiempo del bloque en la fase `name` de la carga que se está
+    perfilando en este hilo. Sin --profile, o dentro de otra fase, no hace nada.
+    """
+    profile = getattr(_profiling, "profile", None)
+    if profile is None or getattr(_profiling, "phase", None):
+        yield
+        return
+    _profiling.phase = name
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profiling.phase = None
+        profile.add(name, time.perf_counter() - t0)
+
+def timed(name: str):
+    """Decorador: toda la llamada cuenta en la fase `name` (ver phase)."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profile_rows(count: int):
+    profile = getattr(_profiling, "profile", None)
+    if profile is not None:
+        with profile._lock:
+            profile.rows += count
+
+def run_profiled(task, profile: LoadProfile, dump: str = None, part: Tuple[str, int, int] = None):
+    """
+    Ejecuta la tarea de una carga registrando fases y consultas en `profile`;
+    con `dump` guarda además un archivo de cProfile (.prof) de la tarea.
+    """
+    _profiling.profile = profile
+    profiler = cProfile.Profile() if dump else None
+    t0 = time.perf_counter()
+    try:
+        with connection.execute_wrapper(profile.count_query):
+            if profiler:
+                profiler.enable()
+            try:
+                return task(part)
+            finally:
+                if profiler:
+                    profiler.disable()
+                    profiler.dump_stats(dump)
+    finally:
+        _profiling.profile = None
+        with profile._lock:
+            profile.elapsed += time.perf_counter() - t0
+
 # -------- Utilidades de IO -------- #
 
-def read_table(path_str: str) -> pd.DataFrame:
+def iter_batches(df: pd.DataFrame, batch: int) -> Iterable[pd.DataFrame]:
+    """
+    Parte el DataFrame en bloques de `batch` filas (0 o negativo = un solo bloque).
+    """
+    if batch <= 0:
+        yield df
+        return
+    for start in range(0, len(df), batch):
+        yield df.iloc[start:start + batch]
+
+def normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quita espacios alrededor de cada celda de texto y reemplaza NaN/None por ''.
+    Se aplica bloque a bloque, columna por columna (vectorizado con .str).
+    Las columnas de fecha nativas (Parquet/Arrow) se dejan con su tipo.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].fillna("").astype(str).str.strip()
+    return df
+
+def _iter_csv(path: Path, chunksize: int, skip: int = 0) -> Iterator[pd.DataFrame]:
+    options = {"dtype": str, "keep_default_na": False}
+    if skip > 0:
+        # Salta las filas ya procesadas sin parsearlas (el encabezado se lee aparte)
+        columns = list(pd.read_csv(path, nrows=0).columns)
+        options.update(header=None, names=columns, skiprows=skip + 1)
+    if chunksize <= 0:
+        yield pd.read_csv(path, **options)
+        return
+    with pd.read_csv(path, chunksize=chunksize, **options) as reader:
+        yield from reader
+
+def _iter_jsonl(path: Path, chunksize: int, skip: int = 0) -> Iterator[pd.DataFrame]:
+    rows = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            rows.append(json.loads(line))
+            if chunksize > 0 and len(rows) >= chunksize:
+                yield pd.DataFrame(rows, dtype=str)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows, dtype=str)
+
+def _iter_xlsx(path: Path, chunksize: int, skip: int = 0) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    # read_only: openpyxl recorre la hoja en streaming sin cargar el libro completo
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ["" if h is None else str(h) for h in header]
+        buffer = []
+        for values in rows:
+            if skip > 0:
+                skip -= 1
+                continue
+            buffer.append(["" if v is None else str(v) for v in values])
+            if chunksize > 0 and len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=columns, dtype=str)
+                buffer = []
+        if buffer or chunksize <= 0:
+            yield pd.DataFrame(buffer, columns=columns, dtype=str)
+    finally:
+        wb.close()
+
+def _arrow_frame(table) -> pd.DataFrame:
+    """
+    Convierte un bloque Arrow a DataFrame: fechas y timestamps quedan como
+    datetime64; el resto se convierte a texto en Arrow (vectorizado), así los
+    códigos numéricos llegan como '5001' y no como 5001.0.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+            columns[name] = column.to_pandas(date_as_object=False)
+        else:
+            columns[name] = pc.cast(column, pa.string()).to_pandas()
+    return pd.DataFrame(columns)
+
+def _iter_arrow(path: Path, chunksize: int, skip: int = 0, columns: List[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Parquet y Arrow IPC (Feather v2): lee solo las columnas pedidas y recorre el
+    archivo por row groups / record batches, re-agrupados en bloques de `chunksize`.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise CommandError("Leer Parquet/Feather requiere pyarrow (pip install pyarrow).")
+
+    if path.suffix.lower() in (".parquet", ".pq"):
+        parquet = pq.ParquetFile(path)
+        schema = parquet.schema_arrow
+        projection = [c for c in schema.names if c in columns] if columns else None
+        batches = parquet.iter_batches(batch_size=chunksize if chunksize > 0 else 65536, columns=projection)
+    else:
+        reader = pa.ipc.open_file(path)
+        schema = reader.schema
+        projection = [c for c in schema.names if c in columns] if columns else None
+        batches = (
+            reader.get_batch(i).select(projection) if projection else reader.get_batch(i)
+            for i in range(reader.num_record_batches)
+        )
+    if projection:
+        schema = pa.schema([schema.field(c) for c in projection])
+
+    pending = []
+    size = 0
+    for batch in batches:
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        batch = batch.slice(skip)
+        skip = 0
+        pending.append(batch)
+        size += batch.num_rows
+        while chunksize > 0 and size >= chunksize:
+            table = pa.Table.from_batches(pending).combine_chunks()
+            yield _arrow_frame(table.slice(0, chunksize))
+            rest = table.slice(chunksize)
+            pending, size = rest.to_batches(), rest.num_rows
+    if size or chunksize <= 0:
+        yield _arrow_frame(pa.Table.from_batches(pending) if pending else schema.empty_table())
+
+def iter_table(path_str: str, chunksize: int = 0, skip: int = 0, columns: List[str] = None) -> Iterator[pd.DataFrame]:
     """
-    Lee CSV/XLSX/JSON y retorna un DataFrame. Normaliza NaN a ''.
-    Para JSON acepta lista de dicts o dict con clave 'rows'.
+    Lee CSV/JSONL/XLSX/JSON/Parquet/Feather en bloques de `chunksize` filas
+    (0 = archivo completo) y retorna cada bloque normalizado, de modo que la
+    memoria pico depende del tamaño del bloque y no del archivo. `skip` omite las
+    primeras filas de datos (reanudación desde un checkpoint).
+    Para JSON acepta lista de dicts o dict con clave 'rows' (se carga completo;
+    para archivos grandes usar JSONL, un objeto por línea).
+    `columns` limita la lectura a esas columnas en los formatos columnares
+    (Parquet/Feather); los demás formatos se leen completos.
     """
     if not path_str:
-        return pd.DataFrame()
+        return
     path = Path(path_str)
     if not path.exists():
         raise CommandError(f"Archivo no existe: {path}")
 
     suffix = path.suffix.lower()
     if suffix == ".csv":
-        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        chunks = _iter_csv(path, chunksize, skip)
+    elif suffix in (".jsonl", ".ndjson"):
+        chunks = _iter_jsonl(path, chunksize, skip)
     elif suffix in (".xlsx", ".xls"):
-        df = pd.read_excel(path, dtype=str, engine="openpyxl")
+        chunks = _iter_xlsx(path, chunksize, skip)
+    elif suffix in (".parquet", ".pq", ".feather", ".arrow", ".ipc"):
+        chunks = _iter_arrow(path, chunksize, skip, columns)
     elif suffix == ".json":
         with path.open("r", encoding="utf-8") as f:
             data = json.load(f)
         rows = data if isinstance(data, list) else data.get("rows", [])
-        df = pd.DataFrame(rows, dtype=str)
+        df = pd.DataFrame(rows, dtype=str).iloc[skip:]
+        del data, rows
+        chunks = iter_batches(df, chunksize)
     else:
         raise CommandError(f"Formato no soportado: {suffix}")
 
-    # Normaliza: quita espacios alrededor y reemplaza NaN por ''
-    df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-    df = df.fillna("")
-    return df
+    while True:
+        with phase("lectura"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        with phase("normalizacion"):
+            chunk = normalize_chunk(chunk)
+        yield chunk
 
-def ensure_columns(df: pd.DataFrame, required: Iterable[str], label: str):
-    missing = [c for c in required if c not in df.columns]
+def read_table(path_str: str) -> pd.DataFrame:
+    """
+    Lee CSV/XLSX/JSON/JSONL completo y retorna un DataFrame. Normaliza NaN a ''.
+    """
+    chunks = list(iter_table(path_str))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+def read_columns(path_str: str) -> List[str]:
+    """
+    Retorna los nombres de columna del archivo leyendo solo su primer bloque.
+    """
+    chunks = iter_table(path_str, chunksize=1)
+    try:
+        first = next(chunks, None)
+    finally:
+        chunks.close()
+    return [] if first is None else list(first.columns)
+
+def ensure_columns(columns: Iterable[str], required: Iterable[str], label: str):
+    columns = set(columns)
+    missing = [c for c in required if c not in columns]
     if missing:
         raise CommandError(f"[{label}] Faltan columnas requeridas: {missing}")
 
+# -------- Carga rápida nativa del motor (--fast) -------- #
+
+def db_frame(df: pd.DataFrame, model, attnames: List[str]) -> pd.DataFrame:
+    """
+    Convierte las columnas (en el orden de `attnames`) al valor que guardaría el
+    ORM, por columna completa: UUID sin guiones donde el motor no tiene tipo
+    uuid, fechas en la zona horaria de la conexión y None para NULL.
+    """
+    out = {}
+    for col, attname in zip(df.columns, attnames):
+        field = model._meta.get_field(attname)
+        target = field.target_field if field.is_relation else field
+        values = df[col].astype(object)
+        null = values.isna()
+        if isinstance(target, models.UUIDField):
+            text = values.astype(str).str.lower()
+            if not connection.features.has_native_uuid_field:
+                text = text.str.replace("-", "", regex=False)
+        elif isinstance(target, models.DateTimeField):
+            stamps = pd.to_datetime(values.mask(null))
+            if connection.vendor == "postgresql":
+                text = stamps.dt.strftime("%Y-%m-%d %H:%M:%S.%f%z")
+            else:
+                if stamps.dt.tz is not None:
+                    stamps = stamps.dt.tz_convert(connection.timezone).dt.tz_localize(None)
+                # Igual que str(datetime): sin microsegundos cuando son cero
+                text = stamps.dt.strftime("%Y-%m-%d %H:%M:%S")
+                micro = stamps.dt.microsecond.fillna(0).astype(int)
+                text = text.where(micro == 0, text + "." + micro.astype(str).str.zfill(6))
+        elif isinstance(target, (models.CharField, models.TextField)):
+            text = values.astype(str)
+        else:
+            text = values.map(lambda v: target.get_db_prep_save(v, connection))
+        out[attname] = text.where(~null, None)
+    return pd.DataFrame(out, index=df.index)
+
+def to_tsv(frame: pd.DataFrame) -> str:
+    """Formato de texto de LOAD DATA / COPY: tabuladores, \\N para NULL y escapes con barra."""
+    lines = None
+    for col in frame.columns:
+        values = frame[col]
+        text = (values.astype(str).str.replace("\\", "\\\\", regex=False)
+                .str.replace("\t", "\\t", regex=False).str.replace("\n", "\\n", regex=False)
+                .str.replace("\r", "\\r", regex=False))
+        text = text.where(values.notna(), "\\N")
+        lines = text if lines is None else lines + "\t" + text
+    return "" if lines is None else "\n".join(lines) + "\n"
+
+class FastLoader:
+    """
+    Escritura masiva sin instanciar modelos. `write` recibe el frame ya
+    convertido (db_frame) y hace un INSERT simple, uno que ignora conflictos
+    (`ignore`) o un upsert sobre `key` que actualiza `update`.
+    """
+
+    def __init__(self):
+        self.qn = connection.ops.quote_name
+
+    def write(self, model, frame: pd.DataFrame, key: str = None, update: List[str] = (), ignore: bool = False):
+        if frame.empty:
+            return
+        table = model._meta.db_table
+        columns = [model._meta.get_field(attname).column for attname in frame.columns]
+        update = [model._meta.get_field(attname).column for attname in update]
+        key = model._meta.get_field(key).column if key else None
+        self.load(table, columns, frame, key, update, ignore)
+
+    def load(self, table, columns, frame, key, update, ignore):
+        raise NotImplementedError
+
+class SQLiteLoader(FastLoader):
+    """SQLite: un executemany con INSERT ... ON CONFLICT (o INSERT OR IGNORE)."""
+
+    def load(self, table, columns, frame, key, update, ignore):
+        cols = ", ".join(self.qn(c) for c in columns)
+        params = ", ".join(["%s"] * len(columns))
+        sql = f"INSERT {'OR IGNORE ' if ignore else ''}INTO {self.qn(table)} ({cols}) VALUES ({params})"
+        if key:
+            sets = ", ".join(f"{self.qn(c)} = excluded.{self.qn(c)}" for c in update)
+            sql += f" ON CONFLICT({self.qn(key)}) DO UPDATE SET {sets}"
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, list(rows))
+
+class StagingLoader(FastLoader):
+    """
+    Motores con carga nativa: el bloque se carga en una tabla temporal de staging
+    con las mismas columnas y se pasa a la tabla real con un solo INSERT ... SELECT.
+    """
+
+    def load(self, table, columns, frame, key, update, ignore):
+        staging = self.qn(f"_carga_{table}")
+        cols = ", ".join(self.qn(c) for c in columns)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP {self.temporary} TABLE IF EXISTS {staging}")
+            cursor.execute(self.create_sql(staging, cols, self.qn(table)))
+            try:
+                self.bulk_load(cursor, staging, cols, to_tsv(frame))
+                cursor.execute(self.insert_sql(self.qn(table), staging, cols, key, update, ignore))
+            finally:
+                cursor.execute(f"DROP {self.temporary} TABLE IF EXISTS {staging}")
+
+class MySQLLoader(StagingLoader):
+    """MySQL/MariaDB: LOAD DATA LOCAL INFILE + INSERT ... ON DUPLICATE KEY UPDATE."""
+    temporary = "TEMPORARY"
+
+    def create_sql(self, staging, cols, table):
+        return f"CREATE TEMPORARY TABLE {staging} SELECT {cols} FROM {table} LIMIT 0"
+
+    def bulk_load(self, cursor, staging, cols, data):
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", suffix=".tsv", delete=False) as f:
+            f.write(data)
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {staging} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({cols})",
+                [f.name],
+            )
+        except DatabaseError as e:
+            raise CommandError(
+                f"LOAD DATA LOCAL INFILE falló ({e}). Habilita local_infile en el servidor y "
+                f"'OPTIONS': {{'local_infile': 1}} en DATABASES, o importa sin --fast."
+            )
+        finally:
+            os.unlink(f.name)
+
+    def insert_sql(self, table, staging, cols, key, update, ignore):
+        if key:
+            sets = ", ".join(f"{self.qn(c)} = VALUES({self.qn(c)})" for c in update)
+            return f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging} ON DUPLICATE KEY UPDATE {sets}"
+        return f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({cols}) SELECT {cols} FROM {staging}"
+
+class PostgreSQLLoader(StagingLoader):
+    """PostgreSQL: COPY FROM STDIN + INSERT ... ON CONFLICT."""
+    temporary = ""
+
+    def create_sql(self, staging, cols, table):
+        return f"CREATE TEMPORARY TABLE {staging} AS SELECT {cols} FROM {table} WITH NO DATA"
+
+    def bulk_load(self, cursor, staging, cols, data):
+        sql = f"COPY {staging} ({cols}) FROM STDIN"
+        raw = cursor.cursor
+        if hasattr(raw, "copy"):  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(data)
+        else:  # psycopg2
+            raw.copy_expert(sql, io.StringIO(data))
+
+    def insert_sql(self, table, staging, cols, key, update, ignore):
+        sql = f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging}"
+        if key:
+            sets = ", ".join(f"{self.qn(c)} = EXCLUDED.{self.qn(c)}" for c in update)
+            return f"{sql} ON CONFLICT ({self.qn(key)}) DO UPDATE SET {sets}"
+        return f"{sql} ON CONFLICT DO NOTHING" if ignore else sql
+
+# connection.vendor -> cargador rápido
+FAST_LOADERS = {
+    "mysql": MySQLLoader,
+    "postgresql": PostgreSQLLoader,
+    "sqlite": SQLiteLoader,
+}
+
+def fast_write(model, df: pd.DataFrame, attnames: List[str], key: str = None, update: List[str] = (),
+               ignore: bool = False):
+    """Escribe `df` (columnas en el orden de `attnames`) con el cargador rápido del motor actual."""
+    FAST_LOADERS[connection.vendor]().write(model, db_frame(df, model, attnames), key, update, ignore)
+
 # -------- Importadores (uno por modelo) -------- #
 
-def upsert_simple(df: pd.DataFrame, model, key: str, fields_map: Dict[str, str]) -> Tuple[int, int]:
+@timed("escritura")
+def upsert_simple(df: pd.DataFrame, model, key: str, fields_map: Dict[str, str], batch: int = 0,
+                  dry: bool = False, fast: bool = False, label: str = None, rejects: "RejectsFile" = None,
+                  source: pd.DataFrame = None) -> Tuple[int, int]:
     """
     Import genérico para modelos sin FKs.
     - key: nombre del campo clave (PK o único) en el modelo (y en el archivo).
     - fields_map: mapea columna_archivo -> campo_modelo
+    - batch: filas por sentencia de upsert (0 = todo el archivo en una sola).
+    - dry: solo consulta las claves existentes para los conteos, sin escribir.
+    - fast: escribe todo el bloque con el cargador nativo del motor (fast_write).
+    - label, rejects, source: para check_unique (filas cuyo valor único ya es de otra clave).
+    Cada bloque cuesta una consulta de claves existentes, una por columna única
+    del modelo (check_unique) y un único
+    INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT en PostgreSQL/SQLite).
+    Las claves repetidas dentro del archivo cuentan como actualizaciones y gana
+    la última fila, igual que con update_or_create fila a fila.
     Retorna (created, updated).
     """
-    created = updated = 0
-    for _, row in df.iterrows():
-        lookup = {key: row[key]}
-        defaults = {to: row[fr] for fr, to in fields_map.items()}
-        obj, was_created = model.objects.update_or_create(**lookup, defaults=defaults)
-        if was_created:
-            created += 1
+    if df.empty:
+        return 0, 0
+
+    total = len(df)
+    df = df.drop_duplicates(subset=[key], keep="last")
+    columns = list(fields_map.keys())
+    update_fields = list(fields_map.values())
+    # MySQL no acepta unique_fields: el ON DUPLICATE KEY aplica sobre cualquier clave única.
+    unique_fields = [key] if connection.features.supports_update_conflicts_with_target else None
+
+    created = 0
+    kept = []
+    for chunk in iter_batches(df, batch):
+        # El ON DUPLICATE KEY de MySQL salta con cualquier clave única: se descartan antes las colisiones
+        size = len(chunk)
+        chunk = check_unique(label or model._meta.model_name, chunk, model, key, fields_map, rejects, source)
+        total -= size - len(chunk)
+        kept.append(chunk)
+        keys = chunk[key].tolist()
+        existing = set(model.objects.filter(**{f"{key}__in": keys}).values_list(key, flat=True))
+        created += len(keys) - len(existing)
+        if dry or fast:
+            continue
+        objs = [
+            model(**{key: values[0]}, **dict(zip(update_fields, values[1:])))
+            for values in chunk[[key] + columns].itertuples(index=False, name=None)
+        ]
+        model.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+    if fast and not dry and kept:
+        # Solo las filas que pasaron check_unique llegan a la tabla de paso y al merge
+        fast_write(model, pd.concat(kept)[[key] + columns], [key] + update_fields, key=key, update=update_fields)
+    return created, total - created
+
+class CatalogKeys:
+    """
+    Claves primarias de cada catálogo, leídas una sola vez por corrida (al primer
+    uso, cuando las etapas de catálogos ya terminaron) para validar FKs en memoria.
+    En --dry-run nada se escribe, así que las cargas registran con `add` las claves
+    que habrían insertado para que las cargas dependientes las vean.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._added = {}
+
+    @timed("fks")
+    def keys(self, model) -> set:
+        if model not in self._keys:
+            self._keys[model] = {str(k) for k in model.objects.values_list("pk", flat=True)}
+            self._keys[model].update(self._added.get(model, ()))
+        return self._keys[model]
+
+    def add(self, model, keys: Iterable[str]):
+        keys = set(keys)
+        self._added.setdefault(model, set()).update(keys)
+        if model in self._keys:
+            self._keys[model].update(keys)
+
+    def added(self, model) -> set:
+        return self._added.get(model, set())
+
+def normalize_uuid(value: str) -> str:
+    """Forma canónica del UUID; los valores inválidos se devuelven tal cual."""
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return value
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+@timed("fks")
+def existing_pacientes(uuids: Iterable[str], batch: int = 0) -> set:
+    """
+    UUIDs (canónicos, como str) de los pacientes que ya existen, consultados en
+    bloques de `batch` para no exceder el límite de parámetros del motor.
+    """
+    valid = []
+    for value in uuids:
+        try:
+            valid.append(uuid.UUID(value))
+        except ValueError:
+            continue
+    step = batch if batch > 0 else max(len(valid), 1)
+    found = set()
+    for start in range(0, len(valid), step):
+        found.update(
+            str(pk) for pk in Paciente.objects.filter(pk__in=valid[start:start + step]).values_list("pk", flat=True)
+        )
+    return found
+
+class RejectsFile:
+    """
+    Archivo de rechazos `<archivo>.rejects.csv`: recibe las filas inválidas con el
+    motivo en la columna `error` en lugar de abortar la importación. Con `key`
+    guarda además las claves rechazadas (ver run_delta).
+    """
+
+    def __init__(self, path_str: str, append: bool = False, key: str = None):
+        self.path = Path(f"{path_str}.rejects.csv")
+        self.count = 0
+        self.key = key
+        self.keys = set()
+        self.summary = Counter()  # columna -> filas rechazadas por esa columna ("bd" = error del motor)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if not append and self.path.exists():
+            self.path.unlink()
+
+    def write(self, df: pd.DataFrame, reasons):
+        out = df.assign(error=reasons)
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(out)
         else:
-            updated += 1
-    return created, updated
+            self._append(out)
 
-def import_pacientes(df: pd.DataFrame):
-    created = updated = 0
+    @contextmanager
+    def attempt(self):
+        """
+        Agrupa los rechazos de un intento de escritura: solo se conservan si el
+        intento termina bien, así un bloque reintentado no los duplica.
+        """
+        outer = getattr(self._local, "pending", None)
+        self._local.pending = []
+        try:
+            yield
+        except BaseException:
+            self._local.pending = outer
+            raise
+        pending, self._local.pending = self._local.pending, outer
+        for out in pending:
+            if outer is not None:
+                outer.append(out)
+            else:
+                self._append(out)
+
+    def _append(self, out: pd.DataFrame):
+        with self._lock:
+            header = not self.path.exists() or self.path.stat().st_size == 0
+            out.to_csv(self.path, mode="a", header=header, index=False)
+            self.count += len(out)
+            if self.key:
+                self.keys.update(out[self.key].astype(str))
+            cols = out["error"].str.split("; ").explode().str.extract(r"^(\w+) ", expand=False)
+            pairs = cols.where(cols.isin(out.columns), "bd").rename("col").reset_index().drop_duplicates()
+            self.summary.update(pairs["col"].value_counts().to_dict())
+
+@timed("fks")
+def check_references(label: str, df: pd.DataFrame, checks: Dict[str, set], optional: Iterable[str] = (),
+                     rejects: RejectsFile = None, source: pd.DataFrame = None,
+                     uuid_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Verifica en memoria que cada valor de las columnas exista en su conjunto de
+    claves (las columnas en `optional` admiten vacío; en `uuid_columns` los
+    valores que no son UUID se reportan como inválidos y no como desconocidos).
+    Sin `rejects`, reporta todas las referencias desconocidas de una vez en un
+    CommandError; con `rejects`, envía esas filas (de `source` si se da, con los
+    valores originales del archivo) al archivo de rechazos y retorna las válidas.
+    """
+    errors = []
+    reasons = pd.Series("", index=df.index)
+    for col, valid in checks.items():
+        bad = ~df[col].isin(valid)
+        if col in optional:
+            bad &= df[col] != ""
+        if not bad.any():
+            continue
+        malformed = bad & ~df[col].map(is_uuid) if col in uuid_columns else pd.Series(False, index=df.index)
+        for mask, rule in ((malformed, "UUID inválido"), (bad & ~malformed, "desconocido")):
+            if not mask.any():
+                continue
+            values = sorted(set(df.loc[mask, col]))
+            sample = ", ".join(values[:10]) + (" ..." if len(values) > 10 else "")
+            errors.append(f"{col}: {len(values)} {rule}(s) ({sample})")
+            reasons = reasons.mask(mask, reasons + f"{col} {rule}; ")
+    if not errors:
+        return df
+    if rejects is None:
+        raise CommandError(f"[{label}] Referencias inexistentes -> " + "; ".join(errors))
+    bad = reasons != ""
+    rejects.write((df if source is None else source).loc[df.index[bad]], reasons[bad].str.rstrip("; "))
+    return df[~bad]
+
+def unique_columns(model, key: str, fields_map: Dict[str, str]) -> Dict[str, str]:
+    """columna_archivo -> campo de los campos únicos del modelo distintos de la clave."""
+    return {
+        col: name for col, name in fields_map.items()
+        if name != key and model._meta.get_field(name).unique and not model._meta.get_field(name).primary_key
+    }
 
-    for _, row in df.iterrows():
-        paciente_uuid = row["paciente_UUID"]
-
-        # RESOLVER FK
-        defaults = {
-            "numero_documento": row["numero_documento"],
-            "primer_nombre": row["primer_nombre"],
-            "segundo_nombre": row["segundo_nombre"],
-            "primer_apellido": row["primer_apellido"],
-            "segundo_apellido": row["segundo_apellido"],
-            "fecha_nacimiento": row["fecha_nacimiento"],
-
-            # FK -> código_id
-            "sexo_biologico_id": row["sexo_biologico"],
-            "identidad_genero_id": row["identidad_genero"],
-            "zona_territorial_residencia_id": row["zona_territorial_residencia"],
-            "tipo_documento_id": row["tipo_documento"],
-            "residencia_id": row["residencia"],
-            "ocupacion_id": row["ocupacion"],
-            "etnia_id": row["etnia"],
-            "comunidad_Etnica_id": row["comunidad_Etnica"] or None,
-            "entidad_prestadora_salud_id": row["entidad_prestadora_salud"]
+@timed("validacion")
+def check_unique(label: str, df: pd.DataFrame, model, key: str, fields_map: Dict[str, str],
+                 rejects: RejectsFile = None, source: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Verifica las columnas únicas distintas de la clave (nombres de los catálogos,
+    numero_documento del paciente): el upsert de MySQL (ON DUPLICATE KEY UPDATE)
+    se dispara con cualquier clave única, así que un valor que ya es de otra
+    clave pisaría esa otra fila. Una consulta IN por columna; también cuenta el
+    valor repetido dentro del bloque con otra clave (gana la primera fila).
+    Sin `rejects` reporta todo en un CommandError; con `rejects` envía esas filas
+    (de `source` si se da, con los valores originales del archivo) a rechazos.
+    """
+    # En MySQL la comparación es la de la collation de la columna: sin mayúsculas ni tildes
+    fold = normalizar if connection.vendor == "mysql" else str
+    keys = df[key].astype(str).map(fold)
+    errors = []
+    reasons = pd.Series("", index=df.index)
+    for col, name in unique_columns(model, key, fields_map).items():
+        present = df[col].notna() & (df[col] != "")
+        if not present.any():
+            continue
+        values = df.loc[present, col]
+        folded = values.map(fold)
+        owners = {
+            fold(value): fold(str(pk))
+            for value, pk in model.objects.filter(**{f"{name}__in": values.unique().tolist()}).values_list(name, "pk")
         }
+        first = keys[present].groupby(folded).transform("first")
+        owner = folded.map(owners).fillna(first)
+        bad = (owner != keys[present]).reindex(df.index, fill_value=False)
+        if not bad.any():
+            continue
+        taken = sorted(set(df.loc[bad, col]))
+        sample = ", ".join(taken[:10]) + (" ..." if len(taken) > 10 else "")
+        errors.append(f"{col}: {len(taken)} ya asignado(s) a otra clave ({sample})")
+        reasons = reasons.mask(bad, reasons + f"{col} ya pertenece a otra clave; ")
+    if not errors:
+        return df
+    if rejects is None:
+        raise CommandError(f"[{label}] Valores únicos repetidos -> " + "; ".join(errors))
+    bad = reasons != ""
+    rejects.write((df if source is None else source).loc[df.index[bad]], reasons[bad].str.rstrip("; "))
+    return df[~bad]
 
-        obj, was_created = Paciente.objects.update_or_create(
-            paciente_UUID=paciente_uuid,
-            defaults=defaults
-        )
+def field_rules(field, strict: bool = True) -> List[Tuple[str, Any]]:
+    """
+    Reglas del campo del modelo como funciones vectorizadas: cada una recibe la
+    columna (solo valores no vacíos) y retorna la máscara de valores inválidos.
+    Sin `strict` solo se aplican las que impone la BD (choices y longitud máxima),
+    no los validadores de formulario (regex, longitud mínima).
+    """
+    rules = []
+    if field.choices:
+        codes = {str(code) for code, _ in field.flatchoices}
+        rules.append(("fuera de choices", lambda s: ~s.isin(codes)))
+    if getattr(field, "max_length", None):
+        rules.append((f"supera {field.max_length} caracteres", lambda s: s.str.len() > field.max_length))
+    if not strict:
+        return rules
+    for validator in field.validators:
+        if isinstance(validator, MinLengthValidator):
+            rules.append((f"menos de {validator.limit_value} caracteres",
+                          lambda s, n=validator.limit_value: s.str.len() < n))
+        elif isinstance(validator, RegexValidator) and not validator.inverse_match:
+            rules.append(("no cumple el formato",
+                          lambda s, rx=validator.regex: ~s.str.contains(rx, regex=True)))
+    return rules
+
+@timed("validacion")
+def validate_columns(label: str, df: pd.DataFrame, model, columns: Iterable[str],
+                     rejects: RejectsFile = None, strict: bool = True) -> pd.DataFrame:
+    """
+    Valida por columna completa (operaciones vectorizadas de pandas) las reglas
+    del modelo: obligatoriedad, choices, longitud, validadores de regex, UUIDs y
+    fechas. Sin `rejects` reúne todos los errores por columna en un CommandError;
+    con `rejects` envía las filas inválidas al archivo de rechazos.
+    Retorna el frame limpio y tipado: UUIDs canónicos y fechas como datetime en
+    la zona horaria del proyecto. Las columnas de FK se validan aparte
+    (check_references). `strict` se pasa a field_rules.
+    """
+    source = df
+    df = df.copy()
+    errors = []
+    reasons = pd.Series("", index=df.index)
+
+    def flag(col, bad, rule, show=None):
+        if not bad.any():
+            return
+        invalid = sorted(set(df.loc[bad, col]))
+        sample = ", ".join(repr(v) for v in invalid[:5]) + (" ..." if len(invalid) > 5 else "")
+        errors.append(f"{col}: {int(bad.sum())} {rule} ({sample})")
+        nonlocal reasons
+        reasons = reasons.mask(bad, reasons + f"{col} {rule}; ")
+
+    for col in columns:
+        if col not in df.columns:
+            continue
+        field = model._meta.get_field(col)
+        if field.is_relation:
+            continue
+        values = df[col]
+        empty = (values == "") | values.isna()
+        if not (field.blank or field.null or field.has_default()):
+            flag(col, empty, "vacío")
+        present = values[~empty]
 
-        if was_created:
-            created += 1
+        if isinstance(field, models.UUIDField):
+            canonical = present.str.lower().str.replace(
+                r"^\{?([0-9a-f]{8})-?([0-9a-f]{4})-?([0-9a-f]{4})-?([0-9a-f]{4})-?([0-9a-f]{12})\}?$",
+                r"\1-\2-\3-\4-\5", regex=True)
+            bad = ~canonical.str.fullmatch(r"[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}")
+            flag(col, bad.reindex(df.index, fill_value=False), "UUID inválido")
+            df.loc[canonical.index, col] = canonical
+        elif isinstance(field, (models.DateTimeField, models.DateField)):
+            parsed = pd.to_datetime(values.mask(empty), errors="coerce")
+            flag(col, parsed.isna() & ~empty, "fecha inválida")
+            if isinstance(field, models.DateTimeField):
+                if settings.USE_TZ and parsed.dt.tz is None:
+                    # Horas inexistentes o repetidas por cambios de horario (Colombia 1992-93)
+                    # se resuelven sin error, como make_aware con zoneinfo.
+                    parsed = parsed.dt.tz_localize(get_current_timezone(), nonexistent="shift_forward",
+                                                   ambiguous=np.ones(len(parsed), dtype=bool))
+                df[col] = parsed.astype(object).where(parsed.notna(), None)
+            else:
+                df[col] = parsed.dt.date.astype(object).where(parsed.notna(), None)
         else:
-            updated += 1
+            for rule, check in field_rules(field, strict):
+                flag(col, check(present).reindex(df.index, fill_value=False), rule)
 
-    return created, updated
+    if not errors:
+        return df
+    if rejects is None:
+        raise CommandError(f"[{label}] Validación -> " + "; ".join(errors))
+    bad = reasons != ""
+    rejects.write(source[bad], reasons[bad].str.rstrip("; "))
+    return df[~bad]
 
-def import_paciente_pais(df: pd.DataFrame):
-    created = updated = 0
-    for _, row in df.iterrows():
-        paciente = Paciente.objects.get(paciente_UUID=row["paciente_UUID"])
-        pais = Pais.objects.get(codigo_pais=row["codigo_pais"])
+# columna_archivo -> catálogo referenciado por la FK del paciente
+PACIENTE_FKS = {
+    "tipo_documento": Tipo_documento,
+    "residencia": Municipio,
+    "ocupacion": Ocupacion,
+    "etnia": Etnia,
+    "comunidad_Etnica": Comunidad_Etnica,
+    "entidad_prestadora_salud": Entidad_Prestadora_Salud,
+}
 
-        _, was_created = Paciente_Pais.objects.update_or_create(
-            paciente_UUID=paciente,
-            codigo_pais=pais
-        )
+# columna_archivo -> campo del modelo Paciente (las FKs van directo a su columna _id)
+PACIENTE_FIELDS = {
+    "numero_documento": "numero_documento",
+    "primer_nombre": "primer_nombre",
+    "segundo_nombre": "segundo_nombre",
+    "primer_apellido": "primer_apellido",
+    "segundo_apellido": "segundo_apellido",
+    "fecha_nacimiento": "fecha_nacimiento",
+    "sexo_biologico": "sexo_biologico",
+    "identidad_genero": "identidad_genero",
+    "zona_territorial_residencia": "zona_territorial_residencia",
+    **{col: f"{col}_id" for col in PACIENTE_FKS},
+}
+
+def import_pacientes(df: pd.DataFrame, refs: CatalogKeys, batch: int = 0, rejects: RejectsFile = None,
+                     dry: bool = False, fast: bool = False):
+    source = df
+    df = validate_columns("paciente", df, Paciente, ["paciente_UUID", *PACIENTE_FIELDS], rejects)
+    df = check_references("paciente", df, {col: refs.keys(model) for col, model in PACIENTE_FKS.items()},
+                          optional=PACIENTE_FKS, rejects=rejects, source=source)
+    # Un numero_documento que ya es de otro paciente_UUID pisaría los datos de ese paciente (y sus contactos,
+    # vínculos y directivas quedarían apuntando a otra persona). Se filtra aquí y no solo en upsert_simple
+    # porque el índice de búsqueda y la caché de perfiles usan el mismo frame. upsert_simple lo repite por
+    # lote: si otro worker registró el mismo documento entretanto, la carga se detiene en vez de pisarlo.
+    df = check_unique("paciente", df, Paciente, "paciente_UUID", PACIENTE_FIELDS, rejects, source)
+
+    for col in PACIENTE_FKS:
+        df[col] = df[col].mask(df[col] == "", None)
+    # El upsert no pasa por save(): fecha_actualizacion (ETag de las páginas del paciente) va como una columna más
+    df["fecha_actualizacion"] = now()
+    fields = {**PACIENTE_FIELDS, "fecha_actualizacion": "fecha_actualizacion"}
+    if dry:
+        refs.add(Paciente, df["paciente_UUID"])
+        return upsert_simple(df, Paciente, "paciente_UUID", fields, batch, dry, fast)
+    result = upsert_simple(df, Paciente, "paciente_UUID", fields, batch, dry, fast)
+    # La carga masiva no dispara post_save: los tokens de búsqueda y los perfiles en caché se rehacen aquí
+    with phase("escritura"):
+        indexar_pacientes(df[["paciente_UUID", *CAMPOS_NOMBRE]].itertuples(index=False, name=None), batch or 5000)
+    invalidar_perfiles(df["paciente_UUID"])
+    return result
+
+def import_links(df: pd.DataFrame, label: str, model, col: str, catalog, refs: CatalogKeys, batch: int = 0,
+                 rejects: RejectsFile = None, dry: bool = False, fast: bool = False):
+    """
+    Import de tablas puente paciente <-> catálogo (`col` es a la vez columna del
+    archivo y FK del modelo). Valida pacientes y códigos contra conjuntos en
+    memoria e inserta solo los pares que faltan (sincronizar_vinculos sin
+    eliminar). Los pares que ya existían cuentan como actualizados.
+    """
+    if df.empty:
+        return 0, 0
+
+    source = df
+    df = df.assign(paciente_UUID=df["paciente_UUID"].map(normalize_uuid))
+    uuids = df["paciente_UUID"].unique().tolist()
+    pacientes = existing_pacientes(uuids, batch) | refs.added(Paciente)
+    df = check_references(label, df, {"paciente_UUID": pacientes, col: refs.keys(catalog)}, rejects=rejects,
+                          source=source, uuid_columns=["paciente_UUID"])
 
-        if was_created:
-            created += 1
+    with phase("escritura"):
+        deseados = {}
+        for p, c in df[["paciente_UUID", col]].itertuples(index=False, name=None):
+            deseados.setdefault(p, set()).add(c)
+        # Solo agrega: los vínculos de un paciente pueden venir repartidos en varios bloques
+        if fast or dry:
+            missing, _ = diferencia_vinculos(model, "paciente_UUID", col, deseados, batch)
+            if not dry:
+                fast_write(model, pd.DataFrame(list(missing), columns=["paciente_UUID", col]),
+                           ["paciente_UUID_id", f"{col}_id"], ignore=True)
+            created = len(missing)
         else:
-            updated += 1
-    return created, updated
+            created, _ = sincronizar_vinculos(model, "paciente_UUID", col, deseados, eliminar=False, batch_size=batch)
+    if not dry:
+        invalidar_perfiles(deseados)
+        tocar_pacientes(deseados, batch or 1000)
+    return created, len(df) - created
+
+def import_paciente_pais(df: pd.DataFrame, refs: CatalogKeys, batch: int = 0, rejects: RejectsFile = None,
+                         dry: bool = False, fast: bool = False):
+    return import_links(df, "paciente_pais", Paciente_Pais, "codigo_pais", Pais, refs, batch, rejects, dry, fast)
+
+def import_paciente_discapacidad(df: pd.DataFrame, refs: CatalogKeys, batch: int = 0, rejects: RejectsFile = None,
+                                 dry: bool = False, fast: bool = False):
+    return import_links(df, "paciente_discapacidad", Paciente_Discapacidad, "id_discapacidad", Discapacidad,
+                        refs, batch, rejects, dry, fast)
+
+# columna_archivo -> catálogo referenciado por la FK del contacto
+CONTACTO_FKS = {
+    "codigo_entidad_prestadora": Entidad_Prestadora_Salud,
+    "codigo_modalidad_realizacion_tecnologia_salud": Modalidad_Realizacion_Tecnologia_Salud,
+    "codigo_via_ingreso_usuario_servicio_salud": Via_Ingreso_Servicio_Salud,
+    "codigo_causa_motivo_atencion": Motivo_Atencion,
+    "codigo_diagnostico": Diagnostico,
+    "codigo_enfermedad_huerfana": Enfermedad_Huerfana,
+}
+
+CONTACTO_CHOICES = {
+    "grupo_servicios": Contacto_Servicio_Salud.GRUPO_SERVICIOS_CHOICES,
+    "entorno_atencion": Contacto_Servicio_Salud.ENTORNO_ATENCION_CHOICES,
+    "clasificacion_triage": Contacto_Servicio_Salud.CLASIFIACION_TRIAGE_CHOICES,
+    "tipo_diagnostico": Contacto_Servicio_Salud.TIPO_DIAGNOSTICO_CHOICES,
+}
+
+CONTACTO_FECHAS = ["fecha_hora_inicio_atencion", "fecha_hora_triage"]
+
+# columna_archivo -> campo del modelo Contacto_Servicio_Salud
+CONTACTO_FIELDS = {
+    "paciente_UUID": "paciente_UUID_id",
+    **{col: col for col in CONTACTO_FECHAS},
+    **{col: col for col in CONTACTO_CHOICES},
+    **{col: f"{col}_id" for col in CONTACTO_FKS},
+}
+
+def import_contactos(df: pd.DataFrame, refs: CatalogKeys, batch: int = 0, rejects: RejectsFile = None,
+                     dry: bool = False, fast: bool = False):
+    """
+    Import de encuentros (Contacto_Servicio_Salud). Valida por columna los choices,
+    las fechas y el id, y contra conjuntos en memoria los pacientes y las seis FKs
+    de catálogo. Las filas sin id_contacto_UUID son encuentros nuevos
+    y van en bulk_create directo; las que traen id se cargan con upsert, así una
+    re-ejecución del mismo archivo no duplica encuentros.
+    """
+    if df.empty:
+        return 0, 0
+
+    source = df
+    df = validate_columns("contacto", df, Contacto_Servicio_Salud,
+                          ["id_contacto_UUID", *CONTACTO_FECHAS, *CONTACTO_CHOICES], rejects)
+    df = df.assign(paciente_UUID=df["paciente_UUID"].map(normalize_uuid))
+    pacientes = existing_pacientes(df["paciente_UUID"].unique().tolist(), batch) | refs.added(Paciente)
+    checks = {"paciente_UUID": pacientes}
+    checks.update({col: refs.keys(model) for col, model in CONTACTO_FKS.items()})
+    df = check_references("contacto", df, checks, optional=["codigo_enfermedad_huerfana"], rejects=rejects,
+                          source=source, uuid_columns=["paciente_UUID"])
+
+    df["codigo_enfermedad_huerfana"] = df["codigo_enfermedad_huerfana"].mask(df["codigo_enfermedad_huerfana"] == "", None)
+
+    if "id_contacto_UUID" in df.columns:
+        with_id = df["id_contacto_UUID"] != ""
+    else:
+        with_id = pd.Series(False, index=df.index)
+
+    created, updated = upsert_simple(df[with_id], Contacto_Servicio_Salud, "id_contacto_UUID", CONTACTO_FIELDS,
+                                     batch, dry, fast)
+
+    new = df[~with_id]
+    if dry:
+        return created + len(new), updated
+    with phase("escritura"):
+        if fast:
+            ids = pd.Series([uuid.uuid4() for _ in range(len(new))], index=new.index, name="id_contacto_UUID")
+            fast_write(Contacto_Servicio_Salud, pd.concat([ids, new[list(CONTACTO_FIELDS)]], axis=1),
+                       ["id_contacto_UUID", *CONTACTO_FIELDS.values()])
+        else:
+            columns = list(CONTACTO_FIELDS.keys())
+            attnames = list(CONTACTO_FIELDS.values())
+            Contacto_Servicio_Salud.objects.bulk_create(
+                [Contacto_Servicio_Salud(**dict(zip(attnames, values)))
+                 for values in new[columns].itertuples(index=False, name=None)],
+                batch_size=batch or None,
+            )
+        tocar_pacientes(df["paciente_UUID"].unique(), batch or 1000)
+    return created + len(new), updated
+
+
+# label -> (opción CLI, modelo, clave, columna_archivo -> campo_modelo)
+CATALOGOS = {
+    "pais": ("pais", Pais, "codigo_pais", {"nombre_pais": "nombre_pais"}),
+    "municipio": ("municipio", Municipio, "codigo_municipio", {"nombre_municipio": "nombre_municipio"}),
+    "ocupacion": ("ocupacion", Ocupacion, "codigo_ocupacion", {"nombre_ocupacion": "nombre_ocupacion"}),
+    "etnia": ("etnia", Etnia, "identificador_etnia", {"nombre_etnia": "nombre_etnia"}),
+    "comunidad_etnica": ("comunidad", Comunidad_Etnica, "codigo_comunidad_etnica",
+                         {"nombre_comunidad_etnica": "nombre_comunidad_etnica"}),
+    "discapacidad": ("discapacidad", Discapacidad, "id_discapacidad", {"nombre_discapacidad": "nombre_discapacidad"}),
+    "tipo_documento": ("tipo_doc", Tipo_documento, "codigo_tipo_documento",
+                       {"nombre_tipo_documento": "nombre_tipo_documento"}),
+    "entidad_prestadora_salud": ("entidad_prestadora", Entidad_Prestadora_Salud, "codigo_entidad_prestadora", {
+        "nombre_entidad_prestadora": "nombre_entidad_prestadora",
+        "es_eps": "es_eps",
+        "es_ips": "es_ips",
+        "es_arl": "es_arl",
+        "es_aseguradora": "es_aseguradora",
+    }),
+    "modalidad_realizacion_tecnologia_salud": ("modalidad_tec", Modalidad_Realizacion_Tecnologia_Salud,
+                                               "codigo_modalidad_realizacion_tecnologia_salud",
+                                               {"nombre_modalidad_realizacion_tecnologia_salud": "nombre_modalidad_realizacion_tecnologia_salud"}),
+    "via_ingreso_servicio_salud": ("via_ingreso", Via_Ingreso_Servicio_Salud,
+                                   "codigo_via_ingreso_usuario_servicio_salud",
+                                   {"nombre_via_ingreso_usuario_servicio_salud": "nombre_via_ingreso_usuario_servicio_salud"}),
+    "motivo_atencion": ("motivo_atencion", Motivo_Atencion, "codigo_causa_motivo_atencion",
+                        {"nombre_causa_motivo_atencion": "nombre_causa_motivo_atencion"}),
+    "enfermedad_huerfana": ("enf_huerfana", Enfermedad_Huerfana, "codigo_enfermedad_huerfana",
+                            {"nombre_enfermedad_huerfana": "nombre_enfermedad_huerfana"}),
+    "diagnostico": ("diagnostico", Diagnostico, "codigo_diagnostico", {"nombre_diagnostico": "nombre_diagnostico"}),
+}
+
+# Archivos de catálogo incluidos en el proyecto (Clinica/data)
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+ARCHIVOS_CATALOGOS = {
+    "pais": "pais.csv",
+    "municipio": "municipio.csv",
+    "ocupacion": "ocupacion.csv",
+    "etnia": "etnia.csv",
+    "comunidad_etnica": "comunidad_etnica.csv",
+    "discapacidad": "discapacidad.csv",
+    "tipo_documento": "tipo_documento.csv",
+    "entidad_prestadora_salud": "entidad_prestadora_salud.csv",
+    "modalidad_realizacion_tecnologia_salud": "modalidad_tecnologia.csv",
+    "via_ingreso_servicio_salud": "via_ingreso.csv",
+    "motivo_atencion": "motivo_atencion.csv",
+    "enfermedad_huerfana": "enfermedad_huerfana.csv",
+    "diagnostico": "diagnostico.csv",
+}
+
+def import_catalogo(df: pd.DataFrame, label: str, refs: CatalogKeys, batch: int = 0, rejects: RejectsFile = None,
+                    dry: bool = False, fast: bool = False):
+    """
+    Import de un catálogo de CATALOGOS: valida las columnas contra el modelo y
+    hace upsert. Los archivos oficiales no cumplen los regex de los formularios
+    (p. ej. códigos CIE-10 de 4 caracteres frente al regex de 7), así que en los
+    catálogos solo se exigen las reglas de la BD.
+    """
+    _, model, key, fields_map = CATALOGOS[label]
+    source = df
+    df = validate_columns(label, df, model, [key, *fields_map], rejects, strict=False)
+    if dry:
+        refs.add(model, df[key])
+    return upsert_simple(df, model, key, fields_map, batch, dry, fast, label, rejects, source)
+
+# -------- Manifiesto de importación (cargas incrementales) -------- #
+
+def file_sha256(path_str: str) -> str:
+    digest = hashlib.sha256()
+    with open(path_str, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-def import_paciente_discapacidad(df: pd.DataFrame):
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> Dict[str, str]:
+    """
+    Hash SHA-1 de cada fila (columnas en el orden dado), indexado por la primera
+    columna (la clave). Con claves repetidas gana la última fila, como en la carga.
+    """
+    return {
+        values[0]: hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()
+        for values in df[columns].itertuples(index=False, name=None)
+    }
+
+def diff_manifest(label: str, path: str, chunksize: int, columns: List[str]) -> Dict[str, Any]:
+    """
+    Compara el archivo con el último manifiesto del catálogo.
+    Retorna dict con hash, unchanged (archivo idéntico) y, si cambió, los hashes
+    actuales por clave y las claves inserted/changed/removed.
+    """
+    file_hash = file_sha256(path)
+    manifest = Manifiesto_Importacion.objects.filter(pk=label).first()
+    if manifest and manifest.hash_archivo == file_hash:
+        return {"hash": file_hash, "unchanged": True}
+
+    previous = dict(Manifiesto_Fila.objects.filter(catalogo_id=label).values_list("clave", "hash_fila"))
+    current = {}
+    for chunk in iter_table(path, chunksize, columns=columns):
+        current.update(row_hashes(chunk, columns))
+    return {
+        "hash": file_hash,
+        "unchanged": False,
+        "current": current,
+        "inserted": [k for k in current if k not in previous],
+        "changed": [k for k, h in current.items() if k in previous and previous[k] != h],
+        "removed": [k for k in previous if k not in current],
+    }
+
+def save_manifest(label: str, path: str, delta: Dict[str, Any], rejected: set = frozenset(),
+                  prune: bool = True):
+    """
+    Guarda el manifiesto sin las filas rechazadas: conservan su hash anterior (o
+    ninguno), así la próxima corrida las vuelve a intentar. Las claves que ya no
+    están en el archivo solo salen del manifiesto con `prune`; sin él se quedan
+    para que un --prune posterior las encuentre. En ambos casos (rechazos o
+    eliminaciones conservadas) no se guarda el hash del archivo, para que el
+    mismo archivo no se omita entero.
+    """
+    current = delta["current"]
+    removed = delta["removed"] if prune else []
+    pending = rejected or len(removed) != len(delta["removed"])
+    Manifiesto_Importacion.objects.update_or_create(
+        catalogo=label,
+        defaults={"archivo": str(path), "hash_archivo": "" if pending else delta["hash"],
+                  "filas": len(current.keys() - rejected)},
+    )
+    for start in range(0, len(removed), 1000):
+        Manifiesto_Fila.objects.filter(catalogo_id=label, clave__in=removed[start:start + 1000]).delete()
+    unique_fields = ["catalogo", "clave"] if connection.features.supports_update_conflicts_with_target else None
+    Manifiesto_Fila.objects.bulk_create(
+        [Manifiesto_Fila(catalogo_id=label, clave=k, hash_fila=current[k])
+         for k in delta["inserted"] + delta["changed"] if k not in rejected],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=["hash_fila"],
+    )
+
+def run_delta(label: str, path: str, fn, chunksize: int, prune: bool, log, dry: bool = False,
+              rejects: RejectsFile = None, pruned: Dict[str, int] = None) -> Tuple[int, int]:
+    """
+    Carga incremental de un catálogo: si el archivo no cambió desde el último
+    manifiesto no lo toca; si cambió, solo pasa a `fn` las filas insertadas o
+    modificadas. Las claves que desaparecieron del archivo se borran del
+    catálogo solo con `prune` (el borrado arrastra los registros que las usan)
+    y se cuentan en `pruned`. Las claves que `fn` envió a `rejects` no entran
+    al manifiesto. Con `dry` no borra ni actualiza el manifiesto.
+    """
+    _, model, key, fields_map = CATALOGOS[label]
+    delta = diff_manifest(label, path, chunksize, [key, *fields_map])
+    if delta["unchanged"]:
+        log(f"[{label}] sin cambios desde el último manifiesto ({delta['hash'][:12]}); se omite")
+        return 0, 0
+
+    profile_rows(len(delta["current"]))
+    touched = set(delta["inserted"]) | set(delta["changed"])
+    removed = delta["removed"]
     created = updated = 0
+    with transaction.atomic():
+        if touched:
+            for chunk in iter_table(path, chunksize, columns=[key, *fields_map]):
+                chunk = chunk[chunk[key].isin(touched)]
+                if not chunk.empty:
+                    c, u = fn(chunk)
+                    created += c
+                    updated += u
 
-    for _, row in df.iterrows():
-        paciente = Paciente.objects.get(paciente_UUID=row["paciente_UUID"])
-        disc = Discapacidad.objects.get(id_discapacidad=row["id_discapacidad"])
+        if not dry:
+            if prune:
+                for start in range(0, len(removed), 1000):
+                    model.objects.filter(pk__in=removed[start:start + 1000]).delete()
+                if pruned is not None:
+                    pruned[label] = len(removed)
+            save_manifest(label, path, delta, rejects.keys if rejects else frozenset(), prune)
+    log(
+        f"[{label}] delta: insertadas={len(delta['inserted'])} modificadas={len(delta['changed'])} "
+        f"eliminadas={len(removed)}{'' if prune else ' (conservadas, usar --prune)'} "
+        f"sin cambios={len(delta['current']) - len(touched)}"
+    )
+    return created, updated
 
-        _, was_created = Paciente_Discapacidad.objects.update_or_create(
-            paciente_UUID=paciente,
-            id_discapacidad=disc
-        )
+# -------- Planificación de cargas -------- #
+
+# Una carga arranca cuando terminaron las de su lista (si vienen en la misma corrida).
+DEPENDENCIAS = {
+    "paciente": ["tipo_documento", "municipio", "ocupacion", "etnia",
+                 "comunidad_etnica", "entidad_prestadora_salud"],
+    "paciente_pais": ["paciente", "pais"],
+    "paciente_discapacidad": ["paciente", "discapacidad"],
+    "contacto": ["paciente", "entidad_prestadora_salud", "modalidad_realizacion_tecnologia_salud",
+                 "via_ingreso_servicio_salud", "motivo_atencion", "diagnostico", "enfermedad_huerfana"],
+}
+
+# Cargas grandes que se reparten entre workers por rango de hash del UUID del paciente.
+PARTICIONABLES = {
+    "paciente": "paciente_UUID",
+    "paciente_pais": "paciente_UUID",
+    "paciente_discapacidad": "paciente_UUID",
+    "contacto": "paciente_UUID",
+}
+
+def build_stages(labels: Iterable[str]) -> List[List[str]]:
+    """
+    Agrupa las cargas en etapas (orden topológico por niveles): las cargas de
+    una misma etapa no dependen entre sí y pueden ejecutarse a la vez.
+    """
+    pending = list(labels)
+    done = set()
+    stages = []
+    while pending:
+        ready = [
+            label for label in pending
+            if all(dep not in pending for dep in DEPENDENCIAS.get(label, []))
+        ]
+        if not ready:
+            raise CommandError(f"Dependencias circulares entre cargas: {pending}")
+        stages.append(ready)
+        done.update(ready)
+        pending = [label for label in pending if label not in done]
+    return stages
+
+def uuid_bucket(value: str, buckets: int) -> int:
+    """
+    Rango (0..buckets-1) al que pertenece el UUID según sus 32 bits altos.
+    Los valores que no son UUID se reparten por CRC32.
+    """
+    try:
+        high = uuid.UUID(value).int >> 96
+    except ValueError:
+        high = zlib.crc32(value.encode("utf-8"))
+    return (high * buckets) >> 32
+
+class Checkpoint:
+    """
+    Progreso de una carga en modo de commit por bloque. Se guarda en la misma
+    transacción que el bloque, así el offset nunca queda adelantado ni atrasado
+    respecto a lo que quedó escrito.
+    """
 
-        if was_created:
-            created += 1
+    def __init__(self, carga: str, path_str: str):
+        self.carga = carga
+        self.path = str(path_str)
+        self.size = Path(path_str).stat().st_size
+        self.done = False
+
+    def start(self, resume: bool) -> Tuple[int, int, int]:
+        """Retorna (offset, created, updated) desde donde continuar."""
+        record = Checkpoint_Importacion.objects.filter(pk=self.carga).first()
+        if resume and record:
+            # Solo se exige la misma ruta: el caso típico es corregir la fila que
+            # detuvo la carga y reanudar, lo que cambia el tamaño del archivo.
+            if record.archivo != self.path:
+                raise CommandError(
+                    f"[{self.carga}] El checkpoint corresponde a otro archivo ({record.archivo}); "
+                    f"ejecuta sin --resume para empezar de cero."
+                )
+            self.done = record.completado
+            return record.filas_procesadas, record.creados, record.actualizados
+        self.save(0, 0, 0)
+        return 0, 0, 0
+
+    def save(self, offset: int, created: int, updated: int, done: bool = False):
+        Checkpoint_Importacion.objects.update_or_create(carga=self.carga, defaults={
+            "archivo": self.path,
+            "tamano_archivo": self.size,
+            "filas_procesadas": offset,
+            "creados": created,
+            "actualizados": updated,
+            "completado": done,
+        })
+
+def write_chunk(fn, chunk: pd.DataFrame, rejects: RejectsFile = None) -> Tuple[int, int]:
+    """
+    Escribe un bloque. Con `rejects`, si el bloque falla en la BD se parte en
+    mitades (cada una en su savepoint) hasta aislar las filas que fallan, que
+    van a rechazos con el error del motor.
+    """
+    if rejects is None:
+        return fn(chunk)
+    try:
+        with rejects.attempt(), transaction.atomic():
+            return fn(chunk)
+    except DatabaseError as e:
+        if len(chunk) <= 1:
+            rejects.write(chunk, str(e))
+            return 0, 0
+    mid = len(chunk) // 2
+    c1, u1 = write_chunk(fn, chunk.iloc[:mid], rejects)
+    c2, u2 = write_chunk(fn, chunk.iloc[mid:], rejects)
+    return c1 + c2, u1 + u2
+
+def run_loader(path: str, fn, chunksize: int, part: Tuple[str, int, int] = None, label: str = None,
+               chunk_commit: bool = False, resume: bool = False, rejects: RejectsFile = None,
+               columns: List[str] = None) -> Tuple[int, int]:
+    """
+    Ejecuta el importador sobre cada bloque del archivo y suma (created, updated).
+    - part: (columna, índice, total) para procesar solo un rango de hash de UUID.
+    - chunk_commit: confirma cada bloque en su propia transacción y guarda un
+      checkpoint; con resume continúa desde el último checkpoint de la carga.
+    - rejects: archivo de rechazos para filas inválidas (ver write_chunk).
+    - columns: columnas que usa el importador (proyección en Parquet/Feather).
+    """
+    checkpoint = None
+    offset = created = updated = 0
+    if chunk_commit:
+        carga = label if part is None else f"{label}[{part[1] + 1}/{part[2]}]"
+        checkpoint = Checkpoint(carga, path)
+        offset, created, updated = checkpoint.start(resume)
+        if checkpoint.done:
+            return created, updated
+
+    for chunk in iter_table(path, chunksize, skip=offset, columns=columns):
+        rows = len(chunk)
+        if part:
+            col, index, total = part
+            chunk = chunk[chunk[col].map(lambda v: uuid_bucket(v, total)) == index]
+        profile_rows(len(chunk))
+        if checkpoint is None:
+            c, u = write_chunk(fn, chunk, rejects)
         else:
-            updated += 1
+            with transaction.atomic():
+                c, u = write_chunk(fn, chunk, rejects)
+                offset += rows
+                checkpoint.save(offset, created + c, updated + u)
+        created += c
+        updated += u
 
+    if checkpoint:
+        checkpoint.save(offset, created, updated, done=True)
     return created, updated
 
+def run_job(task, part: Tuple[str, int, int], dry: bool, chunk_commit: bool = False) -> Tuple[int, int]:
+    """
+    Carga ejecutada en un hilo worker: usa su propia conexión y su propia
+    transacción (o una por bloque con chunk_commit).
+    """
+    try:
+        with nullcontext() if chunk_commit else transaction.atomic():
+            result = task(part)
+            if dry:
+                transaction.set_rollback(True)
+        return result
+    finally:
+        connection.close()
+
 
 class Command(BaseCommand):
     help = "Importa catálogos maestros (idempotente) desde CSV/XLSX/JSON para tus modelos."
@@ -155,6 +1387,8 @@ class Command(BaseCommand):
         parser.add_argument("--paciente", type=str, help="Archivo de Pacientes")
         parser.add_argument("--paciente_pais", type=str, help="Tabla de paciente_pais")
         parser.add_argument("--paciente_discapacidad", type=str, help="Tabla de paciente_discapacidad")
+        parser.add_argument("--contacto", type=str,
+                            help="Archivo de Contactos con el Servicio de Salud (encuentros; id_contacto_UUID opcional)")
         parser.add_argument("--pais", type=str, help="Archivo de País (codigo_pais, nombre_pais)")
         parser.add_argument("--municipio", type=str, help="Archivo de Municipio (codigo_municipio, nombre_municipio)")
         parser.add_argument("--ocupacion", type=str, help="Archivo de Ocupación (codigo_ocupacion, nombre_ocupacion)")
@@ -175,21 +1409,69 @@ class Command(BaseCommand):
         parser.add_argument("--diagnostico", type=str,
                             help="Archivo Diagnóstico (codigo_diagnostico, nombre_diagnostico)")
 
-        parser.add_argument("--dry-run", action="store_true", help="Valida sin escribir cambios")
-        parser.add_argument("--batch", type=int, default=0, help="(Opcional) No usado aquí; placeholder para futuras optimizaciones")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Valida y cuenta sin escribir cambios (solo consultas de lectura)")
+        parser.add_argument("--delta", action="store_true",
+                            help="Carga incremental de catálogos: omite archivos idénticos al último manifiesto "
+                                 "y solo escribe filas insertadas o modificadas")
+        parser.add_argument("--prune", action="store_true",
+                            help="Con --delta, borra del catálogo las claves que ya no vienen en el archivo")
+        parser.add_argument("--chunk-commit", action="store_true",
+                            help="Confirma cada bloque en su propia transacción y guarda un checkpoint "
+                                 "(por defecto todo se importa en una sola transacción)")
+        parser.add_argument("--resume", action="store_true",
+                            help="Continúa cada carga desde su último checkpoint (implica --chunk-commit; "
+                                 "usar el mismo --workers que la corrida interrumpida)")
+        parser.add_argument("--rejects", action="store_true",
+                            help="Envía las filas inválidas a <archivo>.rejects.csv con el motivo en vez de abortar")
+        parser.add_argument("--fast", action="store_true",
+                            help="Escribe con la carga nativa del motor (LOAD DATA en MySQL, COPY en PostgreSQL, "
+                                 "executemany en SQLite) en lugar del ORM")
+        parser.add_argument("--since-manifest", action="store_true",
+                            help="Solo reporta qué cambió en cada catálogo respecto al último manifiesto, sin escribir")
+        parser.add_argument("--profile", action="store_true",
+                            help="Reporta por carga el tiempo de lectura, normalización, validación, FKs y escritura, "
+                                 "consultas, filas/s y memoria pico (tracemalloc, que agrega sobrecosto)")
+        parser.add_argument("--profile-dir", type=str,
+                            help="Con --profile, guarda un archivo cProfile (.prof) por etapa y carga en este directorio")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Máximo de cargas simultáneas, cada una con su conexión y transacción "
+                                 "(1 = secuencial en una sola transacción)")
+        parser.add_argument("--chunk", type=int, default=50000,
+                            help="Filas leídas por bloque de cada archivo (0 = archivo completo en memoria)")
+        parser.add_argument("--batch", type=int, default=1000,
+                            help="Filas por lote en las escrituras masivas (0 = un solo lote por bloque leído)")
 
     def handle(self, *args, **opts):
         start = now()
         dry = opts["dry_run"]
+        fast = opts["fast"]
+        if fast and connection.vendor not in FAST_LOADERS:
+            raise CommandError(f"--fast no está disponible para {connection.vendor}; motores: {', '.join(FAST_LOADERS)}")
+        batch = opts["batch"]
+        chunksize = opts["chunk"]
+        workers = max(1, opts["workers"])
+        if workers > 1 and connection.vendor == "sqlite":
+            self.stdout.write(self.style.WARNING("SQLite no admite escrituras concurrentes; se usa --workers 1."))
+            workers = 1
 
-        # Carga de DataFrames + validación de columnas requeridas
+        chunk_commit = (opts["chunk_commit"] or opts["resume"]) and not dry
+        refs = CatalogKeys()
+        rejects = {}
+
+        # Validación de columnas requeridas (solo encabezados; los datos se leen en bloques al importar)
         loaders = []
+        projections = {}
 
-        def add(label, path, required, fn):
+        def add(label, path, required, fn, optional=()):
             if path:
-                df = read_table(path)
-                ensure_columns(df, required, label)
-                loaders.append((label, df, fn))
+                ensure_columns(read_columns(path), required, label)
+                loaders.append((label, path, fn))
+                projections[label] = [*required, *optional]
+                if opts["rejects"]:
+                    # De los catálogos se guardan las claves rechazadas, que --delta deja fuera del manifiesto
+                    key = CATALOGOS[label][2] if label in CATALOGOS else None
+                    rejects[label] = RejectsFile(path, append=opts["resume"], key=key)
 
         add("paciente", opts["paciente"], [
             "paciente_UUID", "numero_documento",
@@ -202,94 +1484,170 @@ class Command(BaseCommand):
             "ocupacion", "etnia",
             "comunidad_Etnica",
             "entidad_prestadora_salud"
-        ], import_pacientes)
+        ], lambda df: import_pacientes(df, refs, batch, rejects.get("paciente"), dry, fast))
 
         add("paciente_pais", opts["paciente_pais"],
             ["paciente_UUID", "codigo_pais"],
-            import_paciente_pais)
+            lambda df: import_paciente_pais(df, refs, batch, rejects.get("paciente_pais"), dry, fast))
 
         add("paciente_discapacidad", opts["paciente_discapacidad"],
             ["paciente_UUID", "id_discapacidad"],
-            import_paciente_discapacidad)
-
-        add("pais", opts["pais"], ["codigo_pais", "nombre_pais"],
-            lambda df: upsert_simple(df, Pais, "codigo_pais", {"nombre_pais": "nombre_pais"}))
-
-        add("municipio", opts["municipio"], ["codigo_municipio", "nombre_municipio"],
-            lambda df: upsert_simple(df, Municipio, "codigo_municipio", {"nombre_municipio": "nombre_municipio"}))
-
-        add("ocupacion", opts["ocupacion"], ["codigo_ocupacion", "nombre_ocupacion"],
-            lambda df: upsert_simple(df, Ocupacion, "codigo_ocupacion", {"nombre_ocupacion": "nombre_ocupacion"}))
-
-        add("etnia", opts["etnia"], ["identificador_etnia", "nombre_etnia"],
-            lambda df: upsert_simple(df, Etnia, "identificador_etnia", {"nombre_etnia": "nombre_etnia"}))
-
-        add("comunidad_etnica", opts["comunidad"], ["codigo_comunidad_etnica", "nombre_comunidad_etnica"],
-            lambda df: upsert_simple(df, Comunidad_Etnica, "codigo_comunidad_etnica", {"nombre_comunidad_etnica": "nombre_comunidad_etnica"}))
-
-        add("discapacidad", opts["discapacidad"], ["id_discapacidad", "nombre_discapacidad"],
-            lambda df: upsert_simple(df, Discapacidad, "id_discapacidad", {"nombre_discapacidad": "nombre_discapacidad"}))
-
-        add("tipo_documento", opts["tipo_doc"], ["codigo_tipo_documento", "nombre_tipo_documento"],
-            lambda df: upsert_simple(df, Tipo_documento, "codigo_tipo_documento", {"nombre_tipo_documento": "nombre_tipo_documento"}))
-
-        add("entidad_prestadora_salud", opts["entidad_prestadora"],
-            ["codigo_entidad_prestadora", "nombre_entidad_prestadora", "es_eps", "es_ips", "es_arl", "es_aseguradora"],
-            lambda df: upsert_simple(df, Entidad_Prestadora_Salud, "codigo_entidad_prestadora", {
-                "nombre_entidad_prestadora": "nombre_entidad_prestadora",
-                "es_eps": "es_eps",
-                "es_ips": "es_ips",
-                "es_arl": "es_arl",
-                "es_aseguradora": "es_aseguradora",
-            }))
-
-        add("modalidad_realizacion_tecnologia_salud", opts["modalidad_tec"],
-            ["codigo_modalidad_realizacion_tecnologia_salud", "nombre_modalidad_realizacion_tecnologia_salud"],
-            lambda df: upsert_simple(df, Modalidad_Realizacion_Tecnologia_Salud,
-                                     "codigo_modalidad_realizacion_tecnologia_salud",
-                                     {"nombre_modalidad_realizacion_tecnologia_salud": "nombre_modalidad_realizacion_tecnologia_salud"}))
-
-        add("via_ingreso_servicio_salud", opts["via_ingreso"],
-            ["codigo_via_ingreso_usuario_servicio_salud", "nombre_via_ingreso_usuario_servicio_salud"],
-            lambda df: upsert_simple(df, Via_Ingreso_Servicio_Salud,
-                                     "codigo_via_ingreso_usuario_servicio_salud",
-                                     {"nombre_via_ingreso_usuario_servicio_salud": "nombre_via_ingreso_usuario_servicio_salud"}))
-
-        add("motivo_atencion", opts["motivo_atencion"],
-            ["codigo_causa_motivo_atencion", "nombre_causa_motivo_atencion"],
-            lambda df: upsert_simple(df, Motivo_Atencion, "codigo_causa_motivo_atencion",
-                                     {"nombre_causa_motivo_atencion": "nombre_causa_motivo_atencion"}))
-
-        add("enfermedad_huerfana", opts["enf_huerfana"],
-            ["codigo_enfermedad_huerfana", "nombre_enfermedad_huerfana"],
-            lambda df: upsert_simple(df, Enfermedad_Huerfana, "codigo_enfermedad_huerfana",
-                                     {"nombre_enfermedad_huerfana": "nombre_enfermedad_huerfana"}))
-
-        add("diagnostico", opts["diagnostico"],
-            ["codigo_diagnostico", "nombre_diagnostico"],
-            lambda df: upsert_simple(df, Diagnostico, "codigo_diagnostico",
-                                     {"nombre_diagnostico": "nombre_diagnostico"}))
+            lambda df: import_paciente_discapacidad(df, refs, batch, rejects.get("paciente_discapacidad"), dry, fast))
+
+        add("contacto", opts["contacto"],
+            ["paciente_UUID", *CONTACTO_FECHAS, *CONTACTO_CHOICES, *CONTACTO_FKS],
+            lambda df: import_contactos(df, refs, batch, rejects.get("contacto"), dry, fast),
+            optional=["id_contacto_UUID"])
+
+        for label, (option, model, key, fields_map) in CATALOGOS.items():
+            add(label, opts[option], [key, *fields_map],
+                lambda df, label=label: import_catalogo(df, label, refs, batch, rejects.get(label), dry, fast))
 
         if not loaders:
             raise CommandError("No se especificó ningún archivo. Usa --help para ver opciones.")
 
-        # Ejecución
+        if opts["since_manifest"]:
+            self.report_manifest(loaders, chunksize)
+            return
+
+        # Ejecución por etapas según dependencias; cada tarea recibe la partición (o None)
+        by_label = {}
+        pruned = {}
+        for label, path, fn in loaders:
+            if opts["delta"] and label in CATALOGOS:
+                by_label[label] = lambda part, label=label, path=path, fn=fn: run_delta(
+                    label, path, fn, chunksize, opts["prune"], self.stdout.write, dry, rejects.get(label), pruned)
+            else:
+                by_label[label] = partial(run_loader, path, fn, chunksize, label=label, chunk_commit=chunk_commit,
+                                          resume=opts["resume"], rejects=rejects.get(label),
+                                          columns=projections[label])
+        stages = build_stages(by_label)
         stats = {}
+        timings = []
+
+        profiling = opts["profile"] or bool(opts["profile_dir"])
+        profiles = {}
+        if opts["profile_dir"]:
+            Path(opts["profile_dir"]).mkdir(parents=True, exist_ok=True)
+        if profiling:
+            tracemalloc.start()
+
+        def task_for(label, stage_no, part=None):
+            if not profiling:
+                return by_label[label]
+            profile = profiles.setdefault(label, LoadProfile(label))
+            dump = None
+            if opts["profile_dir"]:
+                suffix = "" if part is None else f"_{part[1] + 1}"
+                dump = str(Path(opts["profile_dir"]) / f"etapa{stage_no}_{label}{suffix}.prof")
+            return partial(run_profiled, by_label[label], profile, dump)
+
+        def take_peak():
+            """Pico de tracemalloc desde la última llamada (None sin --profile)."""
+            if not profiling:
+                return None
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            return peak
+
         try:
-            with transaction.atomic():
-                for label, df, fn in loaders:
-                    c, u = fn(df)
-                    stats[label] = (c, u)
+            if workers == 1:
+                with nullcontext() if chunk_commit else transaction.atomic():
+                    for n, stage in enumerate(stages, start=1):
+                        t0 = time.perf_counter()
+                        for label in stage:
+                            take_peak()
+                            stats[label] = task_for(label, n)(None)
+                            if profiling:
+                                profiles[label].peak = take_peak()
+                        timings.append((stage, time.perf_counter() - t0, None))
+                    if dry:
+                        raise CommandError("Dry-run OK: validación y conteos listos; no se guardaron cambios.")
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    for n, stage in enumerate(stages, start=1):
+                        take_peak()
+                        t0 = time.perf_counter()
+                        futures = []
+                        for label in stage:
+                            if label in PARTICIONABLES:
+                                parts = [(PARTICIONABLES[label], i, workers) for i in range(workers)]
+                            else:
+                                parts = [None]
+                            for part in parts:
+                                futures.append((label, pool.submit(run_job, task_for(label, n, part), part, dry,
+                                                                   chunk_commit)))
+                        for label, future in futures:
+                            c, u = future.result()
+                            prev_c, prev_u = stats.get(label, (0, 0))
+                            stats[label] = (prev_c + c, prev_u + u)
+                        # tracemalloc es de todo el proceso: con hilos el pico solo se puede dar por etapa
+                        timings.append((stage, time.perf_counter() - t0, take_peak()))
                 if dry:
                     raise CommandError("Dry-run OK: validación y conteos listos; no se guardaron cambios.")
         except CommandError as e:
             # Imprime stats parciales cuando aplica a dry-run
             for label, (c, u) in stats.items():
                 self.stdout.write(f"[{label}] created={c} updated={u}")
+            self.report_rejects(rejects)
+            self.report_profile(profiles)
             raise e
+        finally:
+            if profiling:
+                tracemalloc.stop()
+            # Las cargas masivas no disparan señales: se avisa a la caché de catálogos de cada proceso, solo si
+            # algún catálogo cambió (sin stats la carga no terminó y no se sabe qué quedó escrito)
+            if not dry and any(label in CATALOGOS and (sum(stats.get(label, (1, 0))) or pruned.get(label))
+                               for label in by_label):
+                catalogos.invalidar()
 
         # Éxito
         for label, (c, u) in stats.items():
             self.stdout.write(self.style.SUCCESS(f"[{label}] created={c} updated={u}"))
+        self.report_rejects(rejects)
+        self.report_profile(profiles)
+        for i, (stage, seconds, peak) in enumerate(timings, start=1):
+            memory = "" if peak is None else f" memoria_pico={peak / 2**20:.1f}MB"
+            self.stdout.write(f"Etapa {i} ({', '.join(stage)}): {seconds:.2f}s{memory}")
         elapsed = (now() - start).total_seconds()
-        self.stdout.write(self.style.SUCCESS(f"Importación completa en {elapsed:.2f}s"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"Importación completa en {elapsed:.2f}s"))
+
+    def report_rejects(self, rejects):
+        for label, file in rejects.items():
+            if file.count:
+                self.stdout.write(self.style.WARNING(f"[{label}] rechazadas={file.count} -> {file.path}"))
+                for col, n in file.summary.most_common():
+                    self.stdout.write(f"    {col}: {n}")
+
+    def report_profile(self, profiles):
+        for label, profile in profiles.items():
+            rate = profile.rows / profile.elapsed if profile.elapsed else 0
+            self.stdout.write(
+                f"Perfil [{label}]: filas={profile.rows} total={profile.elapsed:.2f}s filas/s={rate:.0f} "
+                f"consultas={profile.queries}"
+                + ("" if profile.peak is None else f" memoria_pico={profile.peak / 2**20:.1f}MB")
+            )
+            other = profile.elapsed - sum(profile.seconds.values())
+            self.stdout.write("    " + " ".join(
+                [f"{name}={profile.seconds[name]:.2f}s" for name in LoadProfile.PHASES] + [f"otros={other:.2f}s"]
+            ))
+
+    def report_manifest(self, loaders, chunksize):
+        for label, path, _ in loaders:
+            if label not in CATALOGOS:
+                self.stdout.write(f"[{label}] no es un catálogo con manifiesto; se omite")
+                continue
+            _, _, key, fields_map = CATALOGOS[label]
+            delta = diff_manifest(label, path, chunksize, [key, *fields_map])
+            if delta["unchanged"]:
+                self.stdout.write(f"[{label}] sin cambios ({delta['hash'][:12]})")
+                continue
+            self.stdout.write(self.style.WARNING(
+                f"[{label}] insertadas={len(delta['inserted'])} modificadas={len(delta['changed'])} "
+                f"eliminadas={len(delta['removed'])}"
+            ))
+            for kind in ("inserted", "changed", "removed"):
+                keys = delta[kind]
+                if keys:
+                    sample = ", ".join(keys[:10]) + (" ..." if len(keys) > 10 else "")
+                    self.stdout.write(f"    {kind}: {sample}")
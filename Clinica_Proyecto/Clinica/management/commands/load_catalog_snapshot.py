@@ -0,0 +1,61 @@
+# Clinica/management/commands/load_catalog_snapshot.py
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from Clinica.cache_catalogos import catalogos
+from Clinica.models import Snapshot_Catalogo
+from Clinica.management.commands.build_catalog_snapshot import SNAPSHOT_DEFAULT, read_snapshot
+from Clinica.management.commands.import_maestros import CATALOGOS, FAST_LOADERS, fast_write, upsert_simple
+
+
+class Command(BaseCommand):
+    help = ("Carga los catálogos desde el snapshot de build_catalog_snapshot con inserciones masivas. "
+            "Omite las tablas cuyo hash ya coincide con el último snapshot cargado; se puede correr en cada deploy.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--snapshot", type=str, default=str(SNAPSHOT_DEFAULT),
+                            help="Archivo de snapshot (default: Clinica/data/catalogos.snapshot.json.gz)")
+        parser.add_argument("--force", action="store_true", help="Recarga todas las tablas aunque el hash coincida")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        snapshot = read_snapshot(opts["snapshot"])
+        loaded = {s.catalogo: s.hash_contenido for s in Snapshot_Catalogo.objects.all()}
+
+        skipped = 0
+        for label, tabla in snapshot["tablas"].items():
+            _, model, key, fields_map = CATALOGOS[label]
+            if not opts["force"] and loaded.get(label) == tabla["hash"] and model.objects.exists():
+                skipped += 1
+                continue
+
+            df = pd.DataFrame(tabla["filas"], columns=tabla["columnas"])
+            attnames = [key, *fields_map.values()]
+            with transaction.atomic():
+                empty = not model.objects.exists()
+                fast = connection.vendor in FAST_LOADERS
+                if empty and fast:
+                    # Base nueva: INSERT simple, sin la comparación de claves del upsert
+                    fast_write(model, df, attnames)
+                else:
+                    # upsert_simple pasa por check_unique: un nombre que ya es de otro código detiene la
+                    # carga (CommandError) en vez de pisar esa fila con el ON DUPLICATE KEY de MySQL
+                    upsert_simple(df, model, key, fields_map, batch=1000, fast=fast, label=label)
+                Snapshot_Catalogo.objects.update_or_create(catalogo=label, defaults={
+                    "version": snapshot["version"],
+                    "hash_contenido": tabla["hash"],
+                    "filas": len(df),
+                })
+            self.stdout.write(self.style.SUCCESS(
+                f"[{label}] {'insertadas' if empty else 'sincronizadas'}={len(df)} ({tabla['hash'][:12]})"
+            ))
+
+        if skipped < len(snapshot["tablas"]):
+            catalogos.invalidar()
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {snapshot['version'][:12]}: {len(snapshot['tablas']) - skipped} tabla(s) cargada(s), "
+            f"{skipped} sin cambios, en {time.perf_counter() - t0:.2f}s"
+        ))
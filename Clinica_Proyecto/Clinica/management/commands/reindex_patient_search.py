@@ -0,0 +1,38 @@
+# Clinica/management/commands/reindex_patient_search.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Clinica.busqueda import CAMPOS_NOMBRE, indexar_pacientes
+from Clinica.models import Paciente, Paciente_Busqueda
+
+
+class Command(BaseCommand):
+    help = ("Reconstruye los tokens de búsqueda (Paciente_Busqueda) de todos los pacientes. "
+            "Solo hace falta al crear la tabla o si se cargaron pacientes por fuera de la app y de import_maestros.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=5000, help="Pacientes por lote (default: 5000)")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        batch = opts["batch"]
+        filas = Paciente.objects.order_by().values_list("paciente_UUID", *CAMPOS_NOMBRE)
+
+        pacientes = tokens = 0
+        with transaction.atomic():
+            Paciente_Busqueda.objects.all().delete()
+            lote = []
+            for fila in filas.iterator(chunk_size=batch):
+                lote.append(fila)
+                if len(lote) == batch:
+                    tokens += indexar_pacientes(lote, batch)
+                    pacientes += len(lote)
+                    lote = []
+            tokens += indexar_pacientes(lote, batch)
+            pacientes += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{pacientes} pacientes indexados ({tokens} tokens) en {time.perf_counter() - t0:.1f}s"
+        ))
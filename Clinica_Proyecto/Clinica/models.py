@@ -286,6 +286,26 @@ class Entidad_Prestadora_Salud(models.Model):
         verbose_name_plural = "Entidades Prestadoras de Salud"
         ordering = ["codigo_entidad_prestadora"]
 
+class PacienteQuerySet(models.QuerySet):
+    def with_profile(self):
+        """
+        Carga el agregado completo del paciente: catálogos por JOIN y
+        nacionalidades, discapacidades, voluntad anticipada y oposición a
+        donación en una consulta por relación, sin importar qué use la plantilla.
+        """
+        return self.select_related(
+            "tipo_documento", "residencia", "ocupacion", "etnia", "comunidad_Etnica", "entidad_prestadora_salud",
+        ).prefetch_related(
+            "nacionalidad",
+            "discapacidades",
+            models.Prefetch(
+                "voluntad_anticipada_set",
+                queryset=Voluntad_Anticipada.objects.select_related("codigo_entidad_prestadora"),
+                to_attr="voluntades",
+            ),
+            models.Prefetch("oposicion_donacion_set", to_attr="oposiciones"),
+        )
+
 class Paciente(models.Model):
     SEXO_BIOLOGICO_CHOICES = [('01', 'Hombre'), ('02', 'Mujer'), ('O3', 'Indeterminad/Intersexual')]
     IDENTIDAD_GENERO_CHOICES = [('01', 'Masculino'), ('02', 'Femenino'), ('03', 'Transgénero'), ('04', 'Neutro'), ('05', 'No lo declara')]
@@ -367,14 +387,43 @@ class Paciente(models.Model):
 
     nacionalidad = models.ManyToManyField(Pais, through='Paciente_Pais', related_name='pacientes', blank=True)
     discapacidades = models.ManyToManyField(Discapacidad, through='Paciente_Discapacidad', related_name='pacientes', blank=True)
+    # Cambia con cada escritura del paciente o de sus filas relacionadas; de aquí salen el ETag y
+    # el Last-Modified de sus páginas (ver Clinica/condicional.py)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+    # Bloqueo optimista: la edición solo se guarda si nadie la cambió desde que se abrió (ver FormVersionado)
+    version = models.PositiveIntegerField(default=0, db_default=0, editable=False, verbose_name="Versión")
+
+    objects = PacienteQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.primer_nombre} {self.primer_apellido} ({self.numero_documento})"
 
+    @property
+    def voluntad(self):
+        """
+        Voluntad anticipada del paciente o None; usa la precargada por with_profile.
+        """
+        if hasattr(self, "voluntades"):
+            return self.voluntades[0] if self.voluntades else None
+        return self.voluntad_anticipada_set.first()
+
+    @property
+    def oposicion(self):
+        """
+        Oposición a donación del paciente o None; usa la precargada por with_profile.
+        """
+        if hasattr(self, "oposiciones"):
+            return self.oposiciones[0] if self.oposiciones else None
+        return self.oposicion_donacion_set.first()
+
     class Meta:
         verbose_name = "Paciente"
         verbose_name_plural = "Pacientes"
-        ordering = ["primer_apellido", "primer_nombre"]
+        ordering = ["primer_apellido", "primer_nombre", "paciente_UUID"]
+        indexes = [
+            # Orden del listado y de su paginación por keyset
+            models.Index(fields=["primer_apellido", "primer_nombre", "paciente_UUID"], name="paciente_orden_idx"),
+        ]
 
 class Paciente_Discapacidad(models.Model):
     id_discapacidad = models.ForeignKey(Discapacidad, on_delete=models.CASCADE, related_name='pacientes_rel')
@@ -389,6 +438,23 @@ class Paciente_Discapacidad(models.Model):
         verbose_name_plural = "Pacientes Discapacidades"
         ordering = ["paciente_UUID"]
 
+class Paciente_Busqueda(models.Model):
+    # Tokens normalizados (minúsculas, sin tildes ni ñ) de los nombres del paciente; ver Clinica/busqueda.py
+    paciente_UUID = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='tokens_rel', db_index=False)
+    token = models.CharField(max_length=60)
+
+    def __str__(self):
+        return f"{self.token} ({self.paciente_UUID_id})"
+
+    class Meta:
+        unique_together = ('paciente_UUID', 'token')
+        verbose_name = "Token de Búsqueda de Paciente"
+        verbose_name_plural = "Tokens de Búsqueda de Pacientes"
+        indexes = [
+            # Búsqueda por prefijo: rango sobre token, con el paciente en el mismo índice
+            models.Index(fields=["token", "paciente_UUID"], name="busqueda_token_idx"),
+        ]
+
 class Oposicion_Donacion(models.Model):
     MANIFESTACION_OPOSICION_CHOICES = [('01', 'Sí'), ('02', 'No')]
     id_oposicion = models.AutoField(primary_key=True)
@@ -407,6 +473,10 @@ class Oposicion_Donacion(models.Model):
         verbose_name = "Oposición a Donación"
         verbose_name_plural = "Oposiciones a Donación"
         ordering = ["id_oposicion"]
+        constraints = [
+            # Una por paciente, aunque dos ediciones la creen al mismo tiempo
+            models.UniqueConstraint(fields=["paciente_UUID"], name="oposicion_paciente_unica"),
+        ]
 
 class Paciente_Pais(models.Model):
     paciente_UUID = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='paises_rel')
@@ -442,6 +512,10 @@ class Voluntad_Anticipada(models.Model):
         verbose_name = "Voluntad Anticipada"
         verbose_name_plural = "Voluntades Anticipadas"
         ordering = ["id_voluntad"]
+        constraints = [
+            # Una por paciente, aunque dos ediciones la creen al mismo tiempo
+            models.UniqueConstraint(fields=["paciente_UUID"], name="voluntad_paciente_unica"),
+        ]
 
 class Modalidad_Realizacion_Tecnologia_Salud(models.Model):
     codigo_modalidad_realizacion_tecnologia_salud = models.CharField(
@@ -645,8 +719,88 @@ class Contacto_Servicio_Salud(models.Model):
     codigo_diagnostico = models.ForeignKey(Diagnostico, on_delete=models.CASCADE, verbose_name="Código Diagnóstico")
     codigo_enfermedad_huerfana = models.ForeignKey(Enfermedad_Huerfana, on_delete=models.SET_NULL, null=True, verbose_name="Enfermedad Huérfana")
     tipo_diagnostico = models.CharField(max_length=2, choices=TIPO_DIAGNOSTICO_CHOICES, verbose_name="Tipo de Diagnóstico")
+    # Bloqueo optimista de la edición (ver FormVersionado)
+    version = models.PositiveIntegerField(default=0, db_default=0, editable=False, verbose_name="Versión")
 
     class Meta:
         verbose_name = "Contacto Servicio de Salud"
         verbose_name_plural = "Contactos Servicios de Salud"
-        ordering = ["fecha_hora_inicio_atencion"]
\ No newline at end of file
+        ordering = ["fecha_hora_inicio_atencion"]
+        indexes = [
+            # Contactos de un paciente por fecha: listado, filtro por rango y paginación por keyset
+            models.Index(fields=["paciente_UUID", "fecha_hora_inicio_atencion", "id_contacto_UUID"], name="contacto_paciente_fecha_idx"),
+        ]
+
+class Manifiesto_Importacion(models.Model):
+    catalogo = models.CharField(primary_key=True, max_length=60, verbose_name="Catálogo")
+    archivo = models.CharField(max_length=500, verbose_name="Archivo importado")
+    hash_archivo = models.CharField(max_length=64, verbose_name="Hash SHA-256 del archivo")
+    filas = models.PositiveIntegerField(default=0, verbose_name="Filas")
+    fecha_importacion = models.DateTimeField(auto_now=True, verbose_name="Fecha de Importación")
+
+    def __str__(self):
+        return f"Manifiesto {self.catalogo}"
+
+    class Meta:
+        verbose_name = "Manifiesto de Importación"
+        verbose_name_plural = "Manifiestos de Importación"
+        ordering = ["catalogo"]
+
+class Manifiesto_Fila(models.Model):
+    catalogo = models.ForeignKey(Manifiesto_Importacion, on_delete=models.CASCADE, related_name='filas_rel')
+    clave = models.CharField(max_length=64, verbose_name="Clave primaria en el catálogo")
+    hash_fila = models.CharField(max_length=40, verbose_name="Hash SHA-1 de la fila")
+
+    def __str__(self):
+        return f"Fila {self.clave} del Manifiesto {self.catalogo_id}"
+
+    class Meta:
+        unique_together = ('catalogo', 'clave')
+        verbose_name = "Fila de Manifiesto"
+        verbose_name_plural = "Filas de Manifiesto"
+        ordering = ["catalogo", "clave"]
+
+class Checkpoint_Importacion(models.Model):
+    carga = models.CharField(primary_key=True, max_length=80, verbose_name="Carga")
+    archivo = models.CharField(max_length=500, verbose_name="Archivo importado")
+    tamano_archivo = models.BigIntegerField(verbose_name="Tamaño del archivo (bytes)")
+    filas_procesadas = models.BigIntegerField(default=0, verbose_name="Filas procesadas")
+    creados = models.BigIntegerField(default=0, verbose_name="Creados")
+    actualizados = models.BigIntegerField(default=0, verbose_name="Actualizados")
+    completado = models.BooleanField(default=False, verbose_name="¿Completado?")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    def __str__(self):
+        return f"Checkpoint {self.carga} ({self.filas_procesadas} filas)"
+
+    class Meta:
+        verbose_name = "Checkpoint de Importación"
+        verbose_name_plural = "Checkpoints de Importación"
+        ordering = ["carga"]
+
+class Snapshot_Catalogo(models.Model):
+    catalogo = models.CharField(primary_key=True, max_length=60, verbose_name="Catálogo")
+    version = models.CharField(max_length=64, verbose_name="Versión del snapshot")
+    hash_contenido = models.CharField(max_length=64, verbose_name="Hash SHA-256 del contenido")
+    filas = models.PositiveIntegerField(default=0, verbose_name="Filas")
+    fecha_carga = models.DateTimeField(auto_now=True, verbose_name="Fecha de Carga")
+
+    def __str__(self):
+        return f"Snapshot {self.catalogo} ({self.hash_contenido[:12]})"
+
+    class Meta:
+        verbose_name = "Snapshot de Catálogo"
+        verbose_name_plural = "Snapshots de Catálogos"
+        ordering = ["catalogo"]
+
+class Version_Catalogos(models.Model):
+    # Fila única con el contador global que invalida la caché de catálogos de cada proceso
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
+
+    def __str__(self):
+        return f"Catálogos v{self.version}"
+
+    class Meta:
+        verbose_name = "Versión de Catálogos"
+        verbose_name_plural = "Versión de Catálogos"
@@ -0,0 +1,140 @@
+import base64
+import json
+from typing import AsyncIterator, Iterator, List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPage:
+    """
+    Página obtenida por keyset: `items` y los cursores opacos para ir a la
+    página siguiente y a la anterior (None cuando no hay más en esa dirección).
+    """
+
+    def __init__(self, items, next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.prev_cursor)
+
+
+def _encode(direction: str, values) -> str:
+    payload = json.dumps([direction, values], cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str, model, fields: List[str]):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+        if direction not in ("n", "p") or len(values) != len(fields):
+            raise ValueError
+        return direction, [model._meta.get_field(f).to_python(v) for f, v in zip(fields, values)]
+    except Exception:
+        raise Http404("Cursor de paginación inválido")
+
+
+def _after(ordering: List[str], values, reverse: bool = False) -> Q:
+    """
+    Condición "viene después de `values`" en el orden dado (o antes, con
+    `reverse`), expandida campo a campo: (a > x) OR (a = x AND b > y) OR ...
+    Es la forma que los motores resuelven con un rango sobre el índice compuesto.
+    """
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip("-")
+        descending = name.startswith("-") != reverse
+        condition |= equal & Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _keyset_query(queryset, ordering: List[str], cursor: Optional[str], size: int):
+    fields = [name.lstrip("-") for name in ordering]
+    reverse = [f"-{f}" if not name.startswith("-") else f for name, f in zip(ordering, fields)]
+
+    direction, values = _decode(cursor, queryset.model, fields) if cursor else ("n", None)
+    if direction == "n":
+        qs = queryset.order_by(*ordering)
+        if values is not None:
+            qs = qs.filter(_after(ordering, values))
+    else:
+        qs = queryset.order_by(*reverse).filter(_after(ordering, values, reverse=True))
+    return qs[:size + 1], fields, direction, values
+
+
+def _keyset_result(items, fields: List[str], direction: str, values, size: int) -> KeysetPage:
+    more = len(items) > size
+    items = items[:size]
+    if direction == "p":
+        items.reverse()
+
+    def key(obj):
+        return [getattr(obj, f) for f in fields]
+
+    if not items:
+        return KeysetPage(items, None, None)
+    if direction == "n":
+        next_cursor = _encode("n", key(items[-1])) if more else None
+        prev_cursor = _encode("p", key(items[0])) if values is not None else None
+    else:
+        next_cursor = _encode("n", key(items[-1]))
+        prev_cursor = _encode("p", key(items[0])) if more else None
+    return KeysetPage(items, next_cursor, prev_cursor)
+
+
+def keyset_page(queryset, ordering: List[str], cursor: Optional[str] = None, size: int = 50) -> KeysetPage:
+    """
+    Pagina `queryset` por keyset sobre `ordering` (campos con "-" opcional; el
+    último debe ser único, p. ej. la PK). Cada página es un rango sobre el índice
+    que cubre ese orden, así la página N cuesta lo mismo que la primera, a
+    diferencia de OFFSET.
+    """
+    qs, fields, direction, values = _keyset_query(queryset, ordering, cursor, size)
+    return _keyset_result(list(qs), fields, direction, values, size)
+
+
+async def akeyset_page(queryset, ordering: List[str], cursor: Optional[str] = None, size: int = 50) -> KeysetPage:
+    """keyset_page para vistas async (ORM async)."""
+    qs, fields, direction, values = _keyset_query(queryset, ordering, cursor, size)
+    return _keyset_result([obj async for obj in qs], fields, direction, values, size)
+
+
+def keyset_chunks(queryset, ordering: List[str], size: int = 500) -> Iterator[list]:
+    """
+    Recorre todo `queryset` en bloques de `size` filas, cada uno una página por
+    keyset. A diferencia de .iterator(), la memoria es constante también en
+    MySQL, donde mysqlclient trae el resultado completo de cada consulta.
+    """
+    cursor = None
+    while True:
+        page = keyset_page(queryset, ordering, cursor, size)
+        if page.items:
+            yield page.items
+        if not page.next_cursor:
+            return
+        cursor = page.next_cursor
+
+
+async def akeyset_chunks(queryset, ordering: List[str], size: int = 500) -> AsyncIterator[list]:
+    """keyset_chunks para vistas async."""
+    cursor = None
+    while True:
+        page = await akeyset_page(queryset, ordering, cursor, size)
+        if page.items:
+            yield page.items
+        if not page.next_cursor:
+            return
+        cursor = page.next_cursor
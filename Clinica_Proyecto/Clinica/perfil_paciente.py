@@ -0,0 +1,186 @@
+import asyncio
+import time
+import uuid
+from typing import Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache_catalogos import catalogos
+from .models import Oposicion_Donacion, Paciente, Voluntad_Anticipada
+
+# Subirlo al cambiar la forma del perfil: las claves viejas dejan de leerse
+FORMATO = 1
+PERFIL_TTL = 15 * 60
+# Un paciente inexistente también se guarda (poco tiempo) para que los 404 no vayan a la BD
+AUSENTE_TTL = 60
+# Contra estampidas: un solo proceso reconstruye el perfil vencido y los demás lo esperan
+# (garantizado con Redis/Memcached; con FileBasedCache es de mejor esfuerzo, ver obtener_perfil)
+CANDADO_TTL = 10
+ESPERA_CANDADO = 0.05
+REINTENTOS_CANDADO = 20
+
+
+def _clave(paciente_UUID) -> str:
+    # La versión de catálogos va en la clave: al recargar un catálogo los nombres resueltos se descartan solos
+    return f"paciente:perfil:{FORMATO}:{catalogos.version()}:{paciente_UUID}"
+
+
+def _opcion(obj, campo: str):
+    return {"codigo": getattr(obj, campo), "nombre": getattr(obj, f"get_{campo}_display")()}
+
+
+def _catalogo(obj):
+    return {"codigo": obj.pk, "nombre": str(obj)} if obj is not None else None
+
+
+def construir_perfil(paciente: Paciente, nacionalidades: list = None, discapacidades: list = None) -> dict:
+    """
+    Perfil del paciente como datos simples (sin instancias de modelos), listo
+    para la caché. Espera un paciente cargado con Paciente.objects.with_profile(),
+    o las relaciones ya leídas en los argumentos (ver _acargar).
+    """
+    voluntad = paciente.voluntad
+    oposicion = paciente.oposicion
+    if nacionalidades is None:
+        nacionalidades = paciente.nacionalidad.all()
+    if discapacidades is None:
+        discapacidades = paciente.discapacidades.all()
+    return {
+        "paciente_UUID": paciente.paciente_UUID,
+        "numero_documento": paciente.numero_documento,
+        "primer_nombre": paciente.primer_nombre,
+        "segundo_nombre": paciente.segundo_nombre,
+        "primer_apellido": paciente.primer_apellido,
+        "segundo_apellido": paciente.segundo_apellido,
+        "fecha_nacimiento": paciente.fecha_nacimiento,
+        "sexo_biologico": _opcion(paciente, "sexo_biologico"),
+        "identidad_genero": _opcion(paciente, "identidad_genero"),
+        "zona_territorial_residencia": _opcion(paciente, "zona_territorial_residencia"),
+        "tipo_documento": _catalogo(paciente.tipo_documento),
+        "residencia": _catalogo(paciente.residencia),
+        "ocupacion": _catalogo(paciente.ocupacion),
+        "etnia": _catalogo(paciente.etnia),
+        "comunidad_Etnica": _catalogo(paciente.comunidad_Etnica),
+        "entidad_prestadora_salud": _catalogo(paciente.entidad_prestadora_salud),
+        "nacionalidades": [{"codigo": p.pk, "nombre": p.nombre_pais} for p in nacionalidades],
+        "discapacidades": [{"codigo": d.pk, "nombre": d.nombre_discapacidad} for d in discapacidades],
+        "voluntad": {
+            "documento_voluntad_anticipada": _opcion(voluntad, "documento_voluntad_anticipada"),
+            "fecha_suscripcion_documento": voluntad.fecha_suscripcion_documento,
+            "codigo_entidad_prestadora": _catalogo(voluntad.codigo_entidad_prestadora),
+        } if voluntad else None,
+        "oposicion": {
+            "manifestacion_oposicion": _opcion(oposicion, "manifestacion_oposicion"),
+            "fecha_suscripcion_documento": oposicion.fecha_suscripcion_documento,
+        } if oposicion else None,
+    }
+
+
+def _cargar(paciente_UUID: uuid.UUID, clave: str) -> Optional[dict]:
+    paciente = Paciente.objects.with_profile().filter(paciente_UUID=paciente_UUID).first()
+    perfil = construir_perfil(paciente) if paciente else False
+    cache.set(clave, perfil, PERFIL_TTL if paciente else AUSENTE_TTL)
+    return perfil or None
+
+
+def obtener_perfil(paciente_UUID) -> Optional[dict]:
+    """
+    Perfil del paciente desde la caché (lectura directa) o None si no existe.
+    En un fallo solo el proceso que toma el candado consulta la BD; los demás
+    esperan hasta ~1 s a que aparezca el perfil antes de consultarla ellos mismos.
+    """
+    try:
+        paciente_UUID = uuid.UUID(str(paciente_UUID))
+    except ValueError:
+        return None
+    clave = _clave(paciente_UUID)
+    perfil = cache.get(clave)
+    if perfil is not None:
+        return perfil or None
+
+    candado = f"{clave}:candado"
+    # cache.add es atómico en Redis y Memcached; en FileBasedCache (la del proyecto por defecto) es un
+    # has_key + set sin bloqueo, así que dos procesos pueden tomar el candado y consultar ambos la BD
+    if not cache.add(candado, 1, CANDADO_TTL):
+        for _ in range(REINTENTOS_CANDADO):
+            time.sleep(ESPERA_CANDADO)
+            perfil = cache.get(clave)
+            if perfil is not None:
+                return perfil or None
+        return _cargar(paciente_UUID, clave)
+    try:
+        return _cargar(paciente_UUID, clave)
+    finally:
+        cache.delete(candado)
+
+
+def refrescar_perfil(paciente_UUID):
+    """
+    Escritura directa: cuando se confirme la transacción en curso, vuelve a
+    leer el perfil y lo guarda, así la siguiente lectura ya no falla.
+    """
+    transaction.on_commit(lambda: _cargar(paciente_UUID, _clave(paciente_UUID)))
+
+
+def invalidar_perfiles(pacientes: Iterable):
+    """Descarta los perfiles de `pacientes` (UUID) cuando se confirme la transacción en curso."""
+    pacientes = [uuid.UUID(str(p)) for p in pacientes]
+    if pacientes:
+        transaction.on_commit(lambda: cache.delete_many([_clave(p) for p in pacientes]))
+
+
+async def _alista(queryset) -> list:
+    return [obj async for obj in queryset]
+
+
+async def _acargar(paciente_UUID: uuid.UUID, clave: str) -> Optional[dict]:
+    """
+    _cargar con el ORM async: el paciente y sus catálogos con aget, y las cuatro
+    relaciones con async for. Las relaciones se lanzan juntas con gather, aunque
+    Django todavía ejecuta cada consulta en el mismo hilo (thread_sensitive) y en
+    la práctica van una tras otra; el benchmark de benchmark_views lo muestra.
+    """
+    try:
+        paciente = await Paciente.objects.select_related(
+            "tipo_documento", "residencia", "ocupacion", "etnia", "comunidad_Etnica", "entidad_prestadora_salud",
+        ).aget(paciente_UUID=paciente_UUID)
+    except Paciente.DoesNotExist:
+        await cache.aset(clave, False, AUSENTE_TTL)
+        return None
+    nacionalidades, discapacidades, paciente.voluntades, paciente.oposiciones = await asyncio.gather(
+        _alista(paciente.nacionalidad.all()),
+        _alista(paciente.discapacidades.all()),
+        _alista(Voluntad_Anticipada.objects.select_related("codigo_entidad_prestadora").filter(paciente_UUID=paciente)),
+        _alista(Oposicion_Donacion.objects.filter(paciente_UUID=paciente)),
+    )
+    perfil = construir_perfil(paciente, nacionalidades, discapacidades)
+    await cache.aset(clave, perfil, PERFIL_TTL)
+    return perfil
+
+
+async def aobtener_perfil(paciente_UUID) -> Optional[dict]:
+    """Versión async de obtener_perfil (mismo candado) para las vistas async."""
+    try:
+        paciente_UUID = uuid.UUID(str(paciente_UUID))
+    except ValueError:
+        return None
+    # La versión de catálogos puede consultar la BD (ORM síncrono)
+    clave = await sync_to_async(_clave)(paciente_UUID)
+    perfil = await cache.aget(clave)
+    if perfil is not None:
+        return perfil or None
+
+    candado = f"{clave}:candado"
+    if not await cache.aadd(candado, 1, CANDADO_TTL):
+        for _ in range(REINTENTOS_CANDADO):
+            await asyncio.sleep(ESPERA_CANDADO)
+            perfil = await cache.aget(clave)
+            if perfil is not None:
+                return perfil or None
+        return await _acargar(paciente_UUID, clave)
+    try:
+        return await _acargar(paciente_UUID, clave)
+    finally:
+        await cache.adelete(candado)
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .busqueda import CAMPOS_NOMBRE, indexar_pacientes
+from .cache_catalogos import MODELOS_CATALOGO, catalogos
+from .condicional import tocar_pacientes
+from .models import Oposicion_Donacion, Paciente, Voluntad_Anticipada
+from .perfil_paciente import invalidar_perfiles
+
+
+@receiver(post_save, sender=Paciente)
+def indexar_paciente(sender, instance, **kwargs):
+    # Las cargas masivas (import_maestros) no disparan señales e indexan por su cuenta.
+    indexar_pacientes([(instance.pk, *(getattr(instance, campo) for campo in CAMPOS_NOMBRE))])
+
+
+def invalidar_perfil(sender, instance, **kwargs):
+    # Los vínculos (nacionalidades, discapacidades) se editan en bloque desde las vistas, que refrescan el perfil
+    invalidar_perfiles([instance.pk if sender is Paciente else instance.paciente_UUID_id])
+
+
+for model in (Paciente, Voluntad_Anticipada, Oposicion_Donacion):
+    post_save.connect(invalidar_perfil, sender=model, dispatch_uid=f"perfil_save_{model.__name__}")
+    post_delete.connect(invalidar_perfil, sender=model, dispatch_uid=f"perfil_delete_{model.__name__}")
+
+
+def tocar_paciente(sender, instance, **kwargs):
+    # El paciente ya tiene auto_now; sus filas relacionadas cambian su fecha_actualizacion (ETag de sus páginas).
+    # Los contactos la tocan desde sus vistas: con post_delete aquí, borrar un paciente cargaría todos sus contactos
+    tocar_pacientes([instance.paciente_UUID_id])
+
+
+for model in (Voluntad_Anticipada, Oposicion_Donacion):
+    post_save.connect(tocar_paciente, sender=model, dispatch_uid=f"tocar_save_{model.__name__}")
+    post_delete.connect(tocar_paciente, sender=model, dispatch_uid=f"tocar_delete_{model.__name__}")
+
+
+def invalidar_catalogos(sender, **kwargs):
+    # Admin y formularios; las cargas masivas invalidan explícitamente (no disparan señales)
+    catalogos.invalidar()
+
+
+for model in MODELOS_CATALOGO:
+    post_save.connect(invalidar_catalogos, sender=model, dispatch_uid=f"catalogos_save_{model.__name__}")
+    post_delete.connect(invalidar_catalogos, sender=model, dispatch_uid=f"catalogos_delete_{model.__name__}")
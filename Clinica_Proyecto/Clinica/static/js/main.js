@@ -0,0 +1,19 @@
+// Autocompletar de catálogos (AutocompletarWidget): pide sugerencias al servidor
+// mientras se escribe y las muestra en el <datalist>; el campo envía solo el código.
+document.querySelectorAll("input[data-autocompletar]").forEach((input) => {
+  const opciones = document.getElementById(input.getAttribute("list"));
+  let pendiente;
+
+  input.addEventListener("input", () => {
+    clearTimeout(pendiente);
+    const consulta = input.value.trim();
+    if (consulta.length < 2) return;
+
+    pendiente = setTimeout(async () => {
+      const respuesta = await fetch(`${input.dataset.autocompletar}?q=${encodeURIComponent(consulta)}`);
+      if (!respuesta.ok) return;
+      const { resultados } = await respuesta.json();
+      opciones.replaceChildren(...resultados.map(({ codigo, nombre }) => new Option(nombre, codigo)));
+    }, 150);
+  });
+});
@@ -0,0 +1,79 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+
+from .paginacion import akeyset_chunks, keyset_chunks
+
+# Comentario HTML que la plantilla de la página deja donde van las filas
+MARCA_FILAS = "<!--filas-->"
+
+
+def _partes(request, template_name: str, context: dict, template_filas: str, preparar):
+    pagina = render_to_string(template_name, {**context, "streaming": True}, request)
+    cabecera, pie = pagina.split(MARCA_FILAS, 1)
+    plantilla = get_template(template_filas)
+
+    def render_bloque(bloque, inicio):
+        if preparar:
+            preparar(bloque)
+        return plantilla.render({**context, "filas": bloque, "inicio": inicio}, request)
+
+    return cabecera, render_bloque, pie
+
+
+def render_streaming(request, template_name: str, context: dict, bloques, template_filas: str,
+                     preparar=None) -> StreamingHttpResponse:
+    """
+    Respuesta que envía la página por partes: primero todo lo que va antes de
+    MARCA_FILAS (encabezado, filtros, <thead>), luego cada bloque de `bloques`
+    renderizado con `template_filas` y al final el resto de la página. Solo un
+    bloque está en memoria a la vez. `preparar(bloque)` se llama antes de
+    renderizar cada bloque (p. ej. para resolver catálogos).
+    """
+    cabecera, render_bloque, pie = _partes(request, template_name, context, template_filas, preparar)
+
+    def partes():
+        yield cabecera
+        inicio = 0
+        for bloque in bloques:
+            yield render_bloque(bloque, inicio)
+            inicio += len(bloque)
+        yield pie
+
+    return StreamingHttpResponse(partes(), content_type="text/html; charset=utf-8")
+
+
+async def arender_streaming(request, template_name: str, context: dict, bloques, template_filas: str,
+                            preparar=None) -> StreamingHttpResponse:
+    """
+    render_streaming para vistas async: `bloques` es un iterable asíncrono y el
+    render (que puede tocar el ORM síncrono: request.user, catálogos) va en un hilo.
+    """
+    cabecera, render_bloque, pie = await sync_to_async(_partes)(request, template_name, context, template_filas,
+                                                                preparar)
+
+    async def partes():
+        yield cabecera
+        inicio = 0
+        async for bloque in bloques:
+            yield await sync_to_async(render_bloque)(bloque, inicio)
+            inicio += len(bloque)
+        yield pie
+
+    return StreamingHttpResponse(partes(), content_type="text/html; charset=utf-8")
+
+
+async def arender_listado_completo(request, template_name: str, context: dict, queryset, ordering, template_filas: str,
+                                   preparar=None, size: int = 500) -> StreamingHttpResponse:
+    """
+    Listado completo de `queryset` por partes (bloques keyset de `size` filas)
+    desde una vista async. Django acumula en una lista el iterador que no
+    coincide con el servidor, así que bajo ASGI se envían bloques async y bajo
+    WSGI bloques síncronos.
+    """
+    if isinstance(request, ASGIRequest):
+        return await arender_streaming(request, template_name, context, akeyset_chunks(queryset, ordering, size),
+                                       template_filas, preparar)
+    return await sync_to_async(render_streaming)(request, template_name, context,
+                                                 keyset_chunks(queryset, ordering, size), template_filas, preparar)
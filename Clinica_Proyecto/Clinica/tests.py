@@ -1,3 +1,318 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Checkpoint_Importacion, Contacto_Servicio_Salud, Diagnostico, Discapacidad, Enfermedad_Huerfana,
+    Entidad_Prestadora_Salud, Manifiesto_Fila, Modalidad_Realizacion_Tecnologia_Salud, Motivo_Atencion, Municipio,
+    Ocupacion, Oposicion_Donacion, Paciente, Paciente_Discapacidad, Paciente_Pais, Pais, Tipo_documento,
+    Via_Ingreso_Servicio_Salud, Voluntad_Anticipada,
+)
+from .paginacion import keyset_page
+from .perfil_paciente import aobtener_perfil, obtener_perfil
+
+# Caché en memoria por test: la del proyecto (archivos) es compartida entre procesos
+CACHE_PRUEBAS = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def crear_paciente(documento="10000001", **datos):
+    """Paciente con los campos obligatorios; los catálogos deben estar cargados."""
+    return Paciente.objects.create(**{
+        "numero_documento": documento,
+        "primer_nombre": "Ana",
+        "primer_apellido": "Pérez",
+        "fecha_nacimiento": timezone.make_aware(datetime.datetime(1990, 5, 17)),
+        "sexo_biologico": "02",
+        "identidad_genero": "02",
+        "zona_territorial_residencia": "01",
+        **datos,
+    })
+
+
+def crear_contacto(paciente, **datos):
+    """Contacto con el primer código de cada catálogo y de cada choice."""
+    modelo = Contacto_Servicio_Salud
+    return modelo.objects.create(**{
+        "paciente_UUID": paciente,
+        "fecha_hora_inicio_atencion": timezone.now(),
+        "fecha_hora_triage": timezone.now(),
+        "codigo_entidad_prestadora": Entidad_Prestadora_Salud.objects.first(),
+        "codigo_modalidad_realizacion_tecnologia_salud": Modalidad_Realizacion_Tecnologia_Salud.objects.first(),
+        "codigo_via_ingreso_usuario_servicio_salud": Via_Ingreso_Servicio_Salud.objects.first(),
+        "codigo_causa_motivo_atencion": Motivo_Atencion.objects.first(),
+        "codigo_diagnostico": Diagnostico.objects.first(),
+        "codigo_enfermedad_huerfana": Enfermedad_Huerfana.objects.first(),
+        "grupo_servicios": modelo.GRUPO_SERVICIOS_CHOICES[0][0],
+        "entorno_atencion": modelo.ENTORNO_ATENCION_CHOICES[0][0],
+        "clasificacion_triage": modelo.CLASIFIACION_TRIAGE_CHOICES[0][0],
+        "tipo_diagnostico": modelo.TIPO_DIAGNOSTICO_CHOICES[0][0],
+        **datos,
+    })
+
+
+def datos_formularios(respuesta, *nombres):
+    """Datos POST con los valores iniciales de los formularios `nombres` del contexto de `respuesta`."""
+    datos = {}
+    for nombre in nombres:
+        for campo in respuesta.context[nombre]:
+            valor = campo.value()
+            if valor is None:
+                continue
+            if isinstance(valor, list):
+                datos[campo.html_name] = [str(v) for v in valor]
+            elif isinstance(valor, datetime.datetime):
+                datos[campo.html_name] = valor.strftime("%Y-%m-%d %H:%M")
+            elif isinstance(valor, datetime.date):
+                datos[campo.html_name] = valor.strftime("%Y-%m-%d")
+            else:
+                datos[campo.html_name] = str(valor)
+    return datos
+
+
+class CatalogosMixin:
+    """Carga los catálogos del snapshot una vez por clase."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_catalog_snapshot", stdout=io.StringIO())
+
+
+class ArchivosMixin:
+    """Escribe archivos CSV de prueba en un directorio temporal por test."""
+
+    def setUp(self):
+        super().setUp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def csv(self, nombre, encabezado, filas):
+        path = Path(self._tmp.name) / nombre
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(encabezado)
+            escritor.writerows(filas)
+        return str(path)
+
+    def importar(self, **opciones):
+        salida = io.StringIO()
+        call_command("import_maestros", stdout=salida, **opciones)
+        return salida.getvalue()
+
+
+class DeltaTests(ArchivosMixin, TestCase):
+    ENCABEZADO = ["codigo_municipio", "nombre_municipio"]
+
+    def test_prune_posterior_elimina_claves_conservadas(self):
+        """Una clave que sale del archivo sin --prune se borra en un --prune posterior con el mismo archivo."""
+        completo = [["05001", "Medellín"], ["05002", "Abejorral"], ["05004", "Abriaquí"]]
+        self.importar(municipio=self.csv("municipio.csv", self.ENCABEZADO, completo), delta=True)
+        self.assertEqual(Municipio.objects.count(), 3)
+
+        sin_5004 = self.csv("municipio.csv", self.ENCABEZADO, completo[:2])
+        salida = self.importar(municipio=sin_5004, delta=True)
+        self.assertIn("conservadas", salida)
+        self.assertTrue(Municipio.objects.filter(pk="05004").exists())
+        self.assertTrue(Manifiesto_Fila.objects.filter(catalogo_id="municipio", clave="05004").exists())
+
+        salida = self.importar(municipio=sin_5004, delta=True, prune=True)
+        self.assertNotIn("se omite", salida)
+        self.assertFalse(Municipio.objects.filter(pk="05004").exists())
+        self.assertFalse(Manifiesto_Fila.objects.filter(catalogo_id="municipio", clave="05004").exists())
+
+        # Ya sin pendientes, el mismo archivo se omite entero
+        self.assertIn("se omite", self.importar(municipio=sin_5004, delta=True, prune=True))
+
+
+class SnapshotTests(TestCase):
+
+    def test_nombre_de_otro_codigo_detiene_la_carga(self):
+        """Recargar el snapshot no pisa la fila cuyo nombre único ya usa otro código."""
+        call_command("load_catalog_snapshot", stdout=io.StringIO())
+        Pais.objects.filter(pk="ALB").update(nombre_pais="Albania vieja")
+        Pais.objects.create(codigo_pais="ZZZ", nombre_pais="Albania")
+
+        with self.assertRaisesMessage(CommandError, "nombre_pais"):
+            call_command("load_catalog_snapshot", force=True, stdout=io.StringIO())
+        self.assertEqual(Pais.objects.get(pk="ZZZ").nombre_pais, "Albania")
+        self.assertEqual(Pais.objects.get(pk="ALB").nombre_pais, "Albania vieja")
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class PerfilTests(CatalogosMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.paciente = crear_paciente(entidad_prestadora_salud=Entidad_Prestadora_Salud.objects.first())
+        for pais in Pais.objects.all()[:2]:
+            Paciente_Pais.objects.create(paciente_UUID=cls.paciente, codigo_pais=pais)
+        Paciente_Discapacidad.objects.create(paciente_UUID=cls.paciente, id_discapacidad=Discapacidad.objects.first())
+        Voluntad_Anticipada.objects.create(paciente_UUID=cls.paciente, documento_voluntad_anticipada="01",
+                                           codigo_entidad_prestadora=Entidad_Prestadora_Salud.objects.first())
+        Oposicion_Donacion.objects.create(paciente_UUID=cls.paciente, manifestacion_oposicion="02")
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_perfil_async_igual_al_sync(self):
+        """En un fallo de caché el perfil del ORM async coincide con el de with_profile."""
+        esperado = await sync_to_async(obtener_perfil)(self.paciente.pk)
+        self.assertEqual(len(esperado["nacionalidades"]), 2)
+        await cache.aclear()
+        self.assertEqual(await aobtener_perfil(self.paciente.pk), esperado)
+        # Ahora desde la caché
+        self.assertEqual(await aobtener_perfil(self.paciente.pk), esperado)
+
+    async def test_perfil_async_inexistente(self):
+        self.assertIsNone(await aobtener_perfil("no-es-uuid"))
+        self.assertIsNone(await aobtener_perfil("00000000-0000-0000-0000-000000000000"))
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class BloqueoOptimistaTests(CatalogosMixin, TestCase):
+    FORMULARIOS_PACIENTE = ("form_paciente", "form_nacionalidad", "form_discapacidad", "form_voluntad",
+                            "form_oposicion")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = User.objects.create_user("medico", password="clave")
+        # El formulario de edición exige estos catálogos
+        cls.paciente = crear_paciente(tipo_documento=Tipo_documento.objects.first(),
+                                      residencia=Municipio.objects.first(), ocupacion=Ocupacion.objects.first())
+        cls.contacto = crear_contacto(cls.paciente)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def test_edicion_de_paciente_con_version_vieja_responde_409(self):
+        url = reverse("paciente_edit", args=[self.paciente.pk])
+        eps = str(Entidad_Prestadora_Salud.objects.first().pk)
+        # Dos usuarios abren el mismo formulario
+        primero = datos_formularios(self.client.get(url), *self.FORMULARIOS_PACIENTE)
+        segundo = dict(primero)
+        primero.update(primer_nombre="Beatriz", documento_voluntad_anticipada="01", codigo_entidad_prestadora=eps,
+                       manifestacion_oposicion="02")
+        segundo.update(primer_nombre="Carla", documento_voluntad_anticipada="02", codigo_entidad_prestadora=eps,
+                       manifestacion_oposicion="01")
+
+        self.assertEqual(self.client.post(url, primero).status_code, 302)
+        respuesta = self.client.post(url, segundo)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertTrue(respuesta.context["form_paciente"].conflicto)
+
+        self.paciente.refresh_from_db()
+        self.assertEqual(self.paciente.primer_nombre, "Beatriz")
+        self.assertEqual(self.paciente.version, 1)
+        self.assertEqual(Voluntad_Anticipada.objects.get(paciente_UUID=self.paciente).documento_voluntad_anticipada, "01")
+
+    def test_edicion_de_contacto_con_version_vieja_responde_409(self):
+        url = reverse("contacto_salud_edit", args=[self.paciente.pk, self.contacto.pk])
+        primero = datos_formularios(self.client.get(url), "form")
+        segundo = dict(primero)
+        primero["tipo_diagnostico"] = Contacto_Servicio_Salud.TIPO_DIAGNOSTICO_CHOICES[1][0]
+        segundo["tipo_diagnostico"] = Contacto_Servicio_Salud.TIPO_DIAGNOSTICO_CHOICES[2][0]
+
+        self.assertEqual(self.client.post(url, primero).status_code, 302)
+        self.assertEqual(self.client.post(url, segundo).status_code, 409)
+        self.contacto.refresh_from_db()
+        self.assertEqual(self.contacto.tipo_diagnostico, primero["tipo_diagnostico"])
+        self.assertEqual(self.contacto.version, 1)
+
+    def test_una_voluntad_y_una_oposicion_por_paciente(self):
+        eps = Entidad_Prestadora_Salud.objects.first()
+        Voluntad_Anticipada.objects.create(paciente_UUID=self.paciente, documento_voluntad_anticipada="01",
+                                           codigo_entidad_prestadora=eps)
+        Oposicion_Donacion.objects.create(paciente_UUID=self.paciente, manifestacion_oposicion="01")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Voluntad_Anticipada.objects.create(paciente_UUID=self.paciente, documento_voluntad_anticipada="02",
+                                               codigo_entidad_prestadora=eps)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Oposicion_Donacion.objects.create(paciente_UUID=self.paciente, manifestacion_oposicion="02")
+
+
+class CargaRapidaTests(ArchivosMixin, TestCase):
+
+    def cargar(self, path, fast):
+        """Estado final de Pais y salida de la carga, revertidos al terminar."""
+        with transaction.atomic():
+            Pais.objects.bulk_create([Pais(codigo_pais="ALB", nombre_pais="Albania"),
+                                      Pais(codigo_pais="AFG", nombre_pais="Afganistán")])
+            salida = self.importar(pais=path, rejects=True, fast=fast)
+            estado = list(Pais.objects.order_by("pk").values_list("codigo_pais", "nombre_pais"))
+            transaction.set_rollback(True)
+        return estado, [linea for linea in salida.splitlines() if "created=" in linea or "rechazadas=" in linea]
+
+    def test_fast_termina_igual_que_el_orm(self):
+        path = self.csv("pais.csv", ["codigo_pais", "nombre_pais"], [
+            ["ZZ1", "Albania"],            # nombre de otra clave: rechazada
+            ["ZZ2", "Nuevo país"],
+            ["ZZ3", "Nuevo país"],         # repetido dentro del archivo: rechazada
+            ["AFG", "Afganistán Editado"],
+        ])
+        orm = self.cargar(path, fast=False)
+        self.assertEqual(orm[0], [("AFG", "Afganistán Editado"), ("ALB", "Albania"), ("ZZ2", "Nuevo país")])
+        self.assertEqual(self.cargar(path, fast=True), orm)
+
+
+class PaginacionTests(CatalogosMixin, TestCase):
+    ORDEN = ["primer_apellido", "primer_nombre", "paciente_UUID"]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i, apellido in enumerate(["Díaz", "Gómez", "Arias", "Gómez", "Zapata", "López", "Mora"]):
+            crear_paciente(documento=f"2000000{i}", primer_apellido=apellido, primer_nombre=f"N{i}")
+
+    def test_cursores_siguiente_y_anterior(self):
+        esperado = list(Paciente.objects.order_by(*self.ORDEN))
+        pagina1 = keyset_page(Paciente.objects.all(), self.ORDEN, size=3)
+        self.assertIsNone(pagina1.prev_cursor)
+        pagina2 = keyset_page(Paciente.objects.all(), self.ORDEN, pagina1.next_cursor, size=3)
+        pagina3 = keyset_page(Paciente.objects.all(), self.ORDEN, pagina2.next_cursor, size=3)
+        self.assertEqual(pagina1.items + pagina2.items + pagina3.items, esperado)
+        self.assertIsNone(pagina3.next_cursor)
+
+        # Hacia atrás se recorren las mismas páginas
+        self.assertEqual(keyset_page(Paciente.objects.all(), self.ORDEN, pagina3.prev_cursor, size=3).items,
+                         pagina2.items)
+        atras = keyset_page(Paciente.objects.all(), self.ORDEN, pagina2.prev_cursor, size=3)
+        self.assertEqual(atras.items, pagina1.items)
+        self.assertIsNone(atras.prev_cursor)
+
+
+class ReanudarTests(ArchivosMixin, TestCase):
+    ENCABEZADO = ["codigo_municipio", "nombre_municipio"]
+
+    def test_resume_continua_despues_del_ultimo_bloque_confirmado(self):
+        filas = [["05001", "Medellín"], ["05002", "Abejorral"], ["05004", "Abriaquí"], ["05100", ""],
+                 ["05021", "Alejandría"]]
+        path = self.csv("municipio.csv", self.ENCABEZADO, filas)
+        with self.assertRaises(CommandError):
+            self.importar(municipio=path, chunk_commit=True, chunk=2)
+        # El primer bloque quedó confirmado; el de la fila sin nombre no
+        self.assertEqual(sorted(Municipio.objects.values_list("pk", flat=True)), ["05001", "05002"])
+        self.assertEqual(Checkpoint_Importacion.objects.get(pk="municipio").filas_procesadas, 2)
+
+        # Se corrige la fila y se reanuda: el primer bloque (aquí con otro nombre) no se vuelve a leer
+        filas[0][1] = "Medellín Editado"
+        filas[3] = ["05030", "Amagá"]
+        salida = self.importar(municipio=self.csv("municipio.csv", self.ENCABEZADO, filas), resume=True, chunk=2)
+        self.assertIn("[municipio] created=5 updated=0", salida)
+        self.assertEqual(Municipio.objects.get(pk="05001").nombre_municipio, "Medellín")
+        self.assertEqual(Municipio.objects.count(), 5)
+        self.assertTrue(Checkpoint_Importacion.objects.get(pk="municipio").completado)
@@ -1,11 +1,30 @@
+import datetime
+
+from asgiref.sync import sync_to_async
+
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
 from django.db import transaction
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required # Importar para proteger vistas
-
-from .models import Paciente, Paciente_Pais, Paciente_Discapacidad, Voluntad_Anticipada, Oposicion_Donacion , Contacto_Servicio_Salud
-from .forms import FormPaciente, FormNacionalidad, FormDiscapacidad, FormVoluntadAnticipada, FormOposicionDonacion, FormContactoSalud, FormPacienteEdit, FormVoluntadAnticipadaEdit, FormOposicionDonacionEdit, FormContactoSaludEdit
+from django.contrib.admin.views.decorators import staff_member_required
+
+from .models import Paciente, Paciente_Pais, Paciente_Discapacidad, Contacto_Servicio_Salud
+from .forms import FormPaciente, FormNacionalidad, FormDiscapacidad, FormVoluntadAnticipada, FormOposicionDonacion, FormContactoSalud, FormPacienteEdit, FormVoluntadAnticipadaEdit, FormOposicionDonacionEdit, FormContactoSaludEdit, FormRangoFechas, CATALOGOS_CONTACTO
+from .paginacion import akeyset_page, keyset_chunks, keyset_page
+from .streaming import arender_listado_completo, render_streaming
+from .vinculos import sincronizar_vinculos
+from .busqueda import buscar_pacientes
+from .autocompletar import CATALOGOS_AUTOCOMPLETAR, LIMITE_RESULTADOS, indice
+from .cache_catalogos import catalogos
+from .perfil_paciente import aobtener_perfil, obtener_perfil, refrescar_perfil
+from .condicional import condicional_paciente, tocar_pacientes
+
+# Render para las vistas async: las plantillas leen request.user y la sesión, que se cargan
+# de forma perezosa con el ORM síncrono, así que van en un hilo
+arender = sync_to_async(render)
 
 def index(request):
     return render(request, "index.html", {"message": "Bienvenido a la Clínica"})
@@ -29,11 +48,11 @@ def crear_paciente(request):
             Oposicion_Donacion_obj.paciente_UUID = paciente
             Oposicion_Donacion_obj.save()
 
-            for pais in form_nacionalidad.cleaned_data['paises']:
-                Paciente_Pais.objects.create(paciente_UUID=paciente, codigo_pais=pais)
-
-            for disc in form_discapacidad.cleaned_data['discapacidades']:
-                Paciente_Discapacidad.objects.create(paciente_UUID=paciente, id_discapacidad=disc)
+            sincronizar_vinculos(Paciente_Pais, "paciente_UUID", "codigo_pais",
+                                 {paciente.pk: form_nacionalidad.cleaned_data['paises']})
+            sincronizar_vinculos(Paciente_Discapacidad, "paciente_UUID", "id_discapacidad",
+                                 {paciente.pk: form_discapacidad.cleaned_data['discapacidades']})
+            refrescar_perfil(paciente.pk)
 
             return redirect(paciente_list)  # Cambia a tu URL real
     else:
@@ -54,58 +73,46 @@ def crear_paciente(request):
 @login_required # Protegida
 @transaction.atomic
 def paciente_edit(request, id):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id)
+    paciente = get_object_or_404(Paciente.objects.with_profile(), paciente_UUID=id)
+    # Pueden no existir todavía; se crean al guardar, nunca al mostrar el formulario
+    voluntad = paciente.voluntad
+    oposicion = paciente.oposicion
 
     if request.method == "POST":
         form_paciente = FormPacienteEdit(request.POST, instance=paciente)
         form_nacionalidad = FormNacionalidad(request.POST)
         form_discapacidad = FormDiscapacidad(request.POST)
-        form_voluntad = FormVoluntadAnticipadaEdit(request.POST, instance=paciente)
-        form_oposicion = FormOposicionDonacionEdit(request.POST, instance=paciente)
+        form_voluntad = FormVoluntadAnticipadaEdit(request.POST, instance=voluntad)
+        form_oposicion = FormOposicionDonacionEdit(request.POST, instance=oposicion)
 
-        if form_paciente.is_valid() and form_nacionalidad.is_valid() and form_discapacidad.is_valid():
+        # Bloqueo optimista: si otro usuario guardó al paciente desde que se abrió el formulario no se pisa su edición
+        if form_paciente.is_valid() and form_nacionalidad.is_valid() and form_discapacidad.is_valid() and form_voluntad.is_valid() and form_oposicion.is_valid() and form_paciente.reservar_version():
             form_paciente.save() # Guardamos los datos del paciente
 
-            # Limpiar relaciones existentes
-            Paciente_Pais.objects.filter(paciente_UUID=paciente).delete()
-            Paciente_Discapacidad.objects.filter(paciente_UUID=paciente).delete()
-
-            # Volver a guardar relaciones seleccionadas
-            for pais in form_nacionalidad.cleaned_data['paises']:
-                Paciente_Pais.objects.create(paciente_UUID=paciente, codigo_pais=pais)
-
-            for disc in form_discapacidad.cleaned_data['discapacidades']:
-                Paciente_Discapacidad.objects.create(paciente_UUID=paciente, id_discapacidad=disc)
-
-            # Actualizar Voluntad Anticipada y Oposición a Donación
-            Voluntad_Anticipada_obj, created = Voluntad_Anticipada.objects.get_or_create(paciente_UUID=paciente)
-            Oposicion_Donacion_obj, created = Oposicion_Donacion.objects.get_or_create(paciente_UUID=paciente)
+            # Solo se borran los vínculos quitados y se insertan los nuevos
+            sincronizar_vinculos(Paciente_Pais, "paciente_UUID", "codigo_pais",
+                                 {paciente.pk: form_nacionalidad.cleaned_data['paises']})
+            sincronizar_vinculos(Paciente_Discapacidad, "paciente_UUID", "id_discapacidad",
+                                 {paciente.pk: form_discapacidad.cleaned_data['discapacidades']})
 
-            form_voluntad = FormVoluntadAnticipadaEdit(request.POST, instance=Voluntad_Anticipada_obj)
-            form_oposicion = FormOposicionDonacionEdit(request.POST, instance=Oposicion_Donacion_obj)
-
-            if form_voluntad.is_valid() and form_oposicion.is_valid():
-                form_voluntad.save()
-                form_oposicion.save()
-                return redirect("paciente_detail", id=paciente.paciente_UUID)
-            else:
-                # Aquí puedes manejar los errores de los formularios de Voluntad y Oposición
-                pass # Por ahora, solo pasamos
+            # Actualizar (o crear) Voluntad Anticipada y Oposición a Donación
+            Voluntad_Anticipada_obj = form_voluntad.save(commit=False)
+            Voluntad_Anticipada_obj.paciente_UUID = paciente
+            Voluntad_Anticipada_obj.save()
+            Oposicion_Donacion_obj = form_oposicion.save(commit=False)
+            Oposicion_Donacion_obj.paciente_UUID = paciente
+            Oposicion_Donacion_obj.save()
+            # El perfil en caché se reescribe al confirmar la transacción
+            refrescar_perfil(paciente.pk)
+            return redirect("paciente_detail", id=paciente.paciente_UUID)
 
     else:
-        nacionalidades_actuales = paciente.nacionalidad.values_list('codigo_pais', flat=True)
-        discapacidades_actuales = paciente.discapacidades.values_list('id_discapacidad', flat=True)
-
+        # Relaciones ya precargadas por with_profile
         form_paciente = FormPacienteEdit(instance=paciente)
-        form_nacionalidad = FormNacionalidad(initial={'paises': nacionalidades_actuales})
-        form_discapacidad = FormDiscapacidad(initial={'discapacidades': discapacidades_actuales})
-
-        # Obtener o crear instancias para Voluntad Anticipada y Oposición Donación
-        voluntad_anticipada_instance, created = Voluntad_Anticipada.objects.get_or_create(paciente_UUID=paciente)
-        oposicion_donacion_instance, created = Oposicion_Donacion.objects.get_or_create(paciente_UUID=paciente)
-
-        form_voluntad = FormVoluntadAnticipadaEdit(instance=voluntad_anticipada_instance)
-        form_oposicion = FormOposicionDonacionEdit(instance=oposicion_donacion_instance)
+        form_nacionalidad = FormNacionalidad(initial={'paises': [pais.pk for pais in paciente.nacionalidad.all()]})
+        form_discapacidad = FormDiscapacidad(initial={'discapacidades': [disc.pk for disc in paciente.discapacidades.all()]})
+        form_voluntad = FormVoluntadAnticipadaEdit(instance=voluntad)
+        form_oposicion = FormOposicionDonacionEdit(instance=oposicion)
 
     return render(request, "pacientes/paciente_edit.html", {
         "form_paciente": form_paciente,
@@ -114,11 +121,11 @@ def paciente_edit(request, id):
         "paciente": paciente,
         "form_voluntad": form_voluntad,
         "form_oposicion": form_oposicion,
-    })
+    }, status=409 if form_paciente.conflicto else 200)
 
 @login_required # Protegida
 def paciente_delete(request, id):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id)
+    paciente = get_object_or_404(Paciente.objects.with_profile(), paciente_UUID=id)
 
     if request.method == "POST":
         paciente.delete()
@@ -128,55 +135,181 @@ def paciente_delete(request, id):
         "paciente": paciente
     })
 
+PACIENTES_POR_PAGINA = 50
+# Filas por bloque en los listados completos (?todos=1), que se envían por partes
+FILAS_POR_BLOQUE = 500
+
+def _pacientes_listado():
+    # Solo las columnas que muestra la tabla, con el nombre de la EPS en el mismo JOIN
+    return Paciente.objects.select_related("entidad_prestadora_salud").only(
+        "paciente_UUID", "numero_documento", "primer_nombre", "primer_apellido", "sexo_biologico",
+        "entidad_prestadora_salud__nombre_entidad_prestadora",
+    )
+
 @login_required # Protegida
 def paciente_list(request):
-    pacientes = Paciente.objects.all()
-    return render(request, "pacientes/paciente_list.html", {"pacientes": pacientes})
+    orden = ["primer_apellido", "primer_nombre", "paciente_UUID"]
+    if request.GET.get("todos"):
+        return render_streaming(request, "pacientes/paciente_list.html", {},
+                                keyset_chunks(_pacientes_listado(), orden, FILAS_POR_BLOQUE),
+                                "pacientes/paciente_filas.html")
+
+    page = keyset_page(_pacientes_listado(), orden, request.GET.get("cursor"), PACIENTES_POR_PAGINA)
+    return render(request, "pacientes/paciente_list.html", {"pacientes": page, "page": page})
+
+@login_required # Protegida (versión async, ver urls.py)
+async def apaciente_list(request):
+    orden = ["primer_apellido", "primer_nombre", "paciente_UUID"]
+    if request.GET.get("todos"):
+        return await arender_listado_completo(request, "pacientes/paciente_list.html", {}, _pacientes_listado(), orden,
+                                              "pacientes/paciente_filas.html", size=FILAS_POR_BLOQUE)
+
+    page = await akeyset_page(_pacientes_listado(), orden, request.GET.get("cursor"), PACIENTES_POR_PAGINA)
+    return await arender(request, "pacientes/paciente_list.html", {"pacientes": page, "page": page})
+
+# 🔎 BUSCAR PACIENTES (documento o nombres, sin importar tildes)
+@login_required # Protegida
+def paciente_search(request):
+    consulta = request.GET.get("q", "").strip()
+    try:
+        pagina = max(int(request.GET.get("pagina", 1)), 1)
+    except ValueError:
+        pagina = 1
+
+    pacientes = []
+    if consulta:
+        inicio = (pagina - 1) * PACIENTES_POR_PAGINA
+        pacientes = list(buscar_pacientes(_pacientes_listado(), consulta)[inicio:inicio + PACIENTES_POR_PAGINA + 1])
+
+    return render(request, "pacientes/paciente_busqueda.html", {
+        "consulta": consulta,
+        "pacientes": pacientes[:PACIENTES_POR_PAGINA],
+        "pagina": pagina,
+        "hay_siguiente": len(pacientes) > PACIENTES_POR_PAGINA,
+    })
 
 @login_required # Protegida
+@condicional_paciente("id")
 def paciente_detail(request, id):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id)
-    nacionalidades = paciente.nacionalidad.all()
-    discapacidades = paciente.discapacidades.all()
-    # Asegúrate de que Voluntad_Anticipada y Oposicion_Donacion existen o créalas
-    voluntad = Voluntad_Anticipada.objects.filter(paciente_UUID=paciente).first()
-    oposicion = Oposicion_Donacion.objects.filter(paciente_UUID=paciente).first()
-
+    # Perfil desde la caché; solo va a la BD (with_profile) cuando no está guardado
+    paciente = obtener_perfil(id)
+    if paciente is None:
+        raise Http404("Paciente no encontrado")
 
     return render(request, "pacientes/paciente_details.html", {
         "paciente": paciente,
-        "nacionalidades": nacionalidades,
-        "discapacidades": discapacidades,
-        "voluntad": voluntad,
-        "oposicion": oposicion,
+        "nacionalidades": paciente["nacionalidades"],
+        "discapacidades": paciente["discapacidades"],
+        "voluntad": paciente["voluntad"],
+        "oposicion": paciente["oposicion"],
+    })
+
+@login_required # Protegida (versión async, ver urls.py)
+@condicional_paciente("id")
+async def apaciente_detail(request, id):
+    # Perfil desde la caché; solo va a la BD (ORM async, ver _acargar) cuando no está guardado
+    paciente = await aobtener_perfil(id)
+    if paciente is None:
+        raise Http404("Paciente no encontrado")
+
+    return await arender(request, "pacientes/paciente_details.html", {
+        "paciente": paciente,
+        "nacionalidades": paciente["nacionalidades"],
+        "discapacidades": paciente["discapacidades"],
+        "voluntad": paciente["voluntad"],
+        "oposicion": paciente["oposicion"],
     })
 
 #contacto servicio de salud
+CONTACTOS_POR_PAGINA = 50
+
+def _inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+
+def _perfil_o_404(id_paciente):
+    # Encabezado de las vistas de contactos desde la caché de perfiles, sin consultar la BD
+    paciente = obtener_perfil(id_paciente)
+    if paciente is None:
+        raise Http404("Paciente no encontrado")
+    return paciente
+
+def _resolver_catalogos_listado(contactos):
+    # Catálogos que muestra la tabla, desde la caché
+    catalogos.resolver(contactos, "codigo_entidad_prestadora", "codigo_diagnostico")
+
+def _contactos_listado(request, paciente):
+    """
+    (contactos, orden, contexto) del listado de contactos del paciente, común a
+    la vista sync y la async. Arma el queryset sin ejecutarlo.
+    """
+    contactos = Contacto_Servicio_Salud.objects.filter(paciente_UUID=paciente["paciente_UUID"])
+
+    # Rango de fechas opcional: límites en la columna indexada (sin __date) para que use el índice
+    form_fechas = FormRangoFechas(request.GET)
+    if form_fechas.is_valid():
+        if form_fechas.cleaned_data["desde"]:
+            contactos = contactos.filter(fecha_hora_inicio_atencion__gte=_inicio_del_dia(form_fechas.cleaned_data["desde"]))
+        if form_fechas.cleaned_data["hasta"]:
+            siguiente_dia = form_fechas.cleaned_data["hasta"] + datetime.timedelta(days=1)
+            contactos = contactos.filter(fecha_hora_inicio_atencion__lt=_inicio_del_dia(siguiente_dia))
+
+    orden = ["-fecha_hora_inicio_atencion", "-id_contacto_UUID"]
+    # Los enlaces de paginación conservan el filtro
+    filtros = request.GET.copy()
+    filtros.pop("cursor", None)
+    filtros.pop("todos", None)
+    context = {"paciente": paciente, "form_fechas": form_fechas, "filtros": filtros.urlencode()}
+    return contactos, orden, context
+
 # 📋 LISTAR CONTACTOS POR PACIENTE
 @login_required # Protegida
+@condicional_paciente("id_paciente")
 def contacto_salud_list(request, id_paciente):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id_paciente)
-    contactos = Contacto_Servicio_Salud.objects.filter(paciente_UUID=paciente).order_by('-fecha_hora_inicio_atencion')
+    paciente = _perfil_o_404(id_paciente)
+    contactos, orden, context = _contactos_listado(request, paciente)
+
+    if request.GET.get("todos"):
+        return render_streaming(request, "contacto_salud/contacto_salud_list.html", context,
+                                keyset_chunks(contactos, orden, FILAS_POR_BLOQUE),
+                                "contacto_salud/contacto_salud_filas.html", _resolver_catalogos_listado)
+
+    page = keyset_page(contactos, orden, request.GET.get("cursor"), CONTACTOS_POR_PAGINA)
+    _resolver_catalogos_listado(page)
+    return render(request, "contacto_salud/contacto_salud_list.html", {**context, "contactos": page, "page": page})
 
-    return render(request, "contacto_salud/contacto_salud_list.html", {
-        "paciente": paciente,
-        "contactos": contactos,
-    })
+
+@login_required # Protegida (versión async, ver urls.py)
+@condicional_paciente("id_paciente")
+async def acontacto_salud_list(request, id_paciente):
+    paciente = await aobtener_perfil(id_paciente)
+    if paciente is None:
+        raise Http404("Paciente no encontrado")
+    contactos, orden, context = _contactos_listado(request, paciente)
+
+    if request.GET.get("todos"):
+        return await arender_listado_completo(request, "contacto_salud/contacto_salud_list.html", context, contactos,
+                                              orden, "contacto_salud/contacto_salud_filas.html",
+                                              _resolver_catalogos_listado, FILAS_POR_BLOQUE)
+
+    page = await akeyset_page(contactos, orden, request.GET.get("cursor"), CONTACTOS_POR_PAGINA)
+    await sync_to_async(_resolver_catalogos_listado)(page)
+    return await arender(request, "contacto_salud/contacto_salud_list.html", {**context, "contactos": page, "page": page})
 
 
 # ➕ CREAR CONTACTO
 @login_required # Protegida
 @transaction.atomic
 def contacto_salud_create(request, id_paciente):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id_paciente)
+    paciente = _perfil_o_404(id_paciente)
 
     if request.method == "POST":
         form = FormContactoSalud(request.POST)
         if form.is_valid():
             contacto = form.save(commit=False)
-            contacto.paciente_UUID = paciente  # Relación explícita
+            contacto.paciente_UUID_id = paciente["paciente_UUID"]  # Relación explícita
             contacto.save()
-            return redirect("contacto_salud_list", id_paciente=paciente.paciente_UUID)
+            tocar_pacientes([paciente["paciente_UUID"]])  # Nuevo ETag para las páginas del paciente
+            return redirect("contacto_salud_list", id_paciente=paciente["paciente_UUID"])
     else:
         form = FormContactoSalud()
 
@@ -191,14 +324,15 @@ def contacto_salud_create(request, id_paciente):
 @login_required # Protegida
 @transaction.atomic
 def contacto_salud_edit(request, id_paciente, id_contacto):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id_paciente)
-    contacto = get_object_or_404(Contacto_Servicio_Salud, id_contacto_UUID=id_contacto, paciente_UUID=paciente)
+    paciente = _perfil_o_404(id_paciente)
+    contacto = get_object_or_404(Contacto_Servicio_Salud, id_contacto_UUID=id_contacto, paciente_UUID=paciente["paciente_UUID"])
 
     if request.method == "POST":
         form = FormContactoSaludEdit(request.POST, instance=contacto)
-        if form.is_valid():
+        if form.is_valid() and form.reservar_version():  # Bloqueo optimista, como en paciente_edit
             form.save()
-            return redirect("contacto_salud_list", id_paciente=paciente.paciente_UUID)
+            tocar_pacientes([paciente["paciente_UUID"]])
+            return redirect("contacto_salud_list", id_paciente=paciente["paciente_UUID"])
     else:
         form = FormContactoSaludEdit(instance=contacto)
 
@@ -207,14 +341,16 @@ def contacto_salud_edit(request, id_paciente, id_contacto):
         "paciente": paciente,
         "contacto": contacto,
         "titulo": "Editar contacto de salud",
-    })
+    }, status=409 if form.conflicto else 200)
 
 
 # 👁️ DETALLE DE CONTACTO
 @login_required # Protegida
+@condicional_paciente("id_paciente")
 def contacto_salud_details(request, id_paciente, id_contacto):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id_paciente)
-    contacto = get_object_or_404(Contacto_Servicio_Salud, id_contacto_UUID=id_contacto, paciente_UUID=paciente)
+    paciente = _perfil_o_404(id_paciente)
+    contacto = get_object_or_404(Contacto_Servicio_Salud, id_contacto_UUID=id_contacto, paciente_UUID=paciente["paciente_UUID"])
+    catalogos.resolver([contacto], *CATALOGOS_CONTACTO)
 
     return render(request, "contacto_salud/contacto_salud_details.html", {
         "paciente": paciente,
@@ -222,22 +358,60 @@ def contacto_salud_details(request, id_paciente, id_contacto):
     })
 
 
+@login_required # Protegida (versión async, ver urls.py)
+@condicional_paciente("id_paciente")
+async def acontacto_salud_details(request, id_paciente, id_contacto):
+    paciente = await aobtener_perfil(id_paciente)
+    if paciente is None:
+        raise Http404("Paciente no encontrado")
+    contacto = await Contacto_Servicio_Salud.objects.filter(
+        id_contacto_UUID=id_contacto, paciente_UUID=paciente["paciente_UUID"]).afirst()
+    if contacto is None:
+        raise Http404("Contacto no encontrado")
+    await sync_to_async(catalogos.resolver)([contacto], *CATALOGOS_CONTACTO)
+
+    return await arender(request, "contacto_salud/contacto_salud_details.html", {
+        "paciente": paciente,
+        "contacto": contacto,
+    })
+
+
 # ❌ ELIMINAR CONTACTO
 @login_required # Protegida
 @transaction.atomic
 def contacto_salud_delete(request, id_paciente, id_contacto):
-    paciente = get_object_or_404(Paciente, paciente_UUID=id_paciente)
-    contacto = get_object_or_404(Contacto_Servicio_Salud, id_contacto_UUID=id_contacto, paciente_UUID=paciente)
+    paciente = _perfil_o_404(id_paciente)
+    contacto = get_object_or_404(Contacto_Servicio_Salud, id_contacto_UUID=id_contacto, paciente_UUID=paciente["paciente_UUID"])
 
     if request.method == "POST":
         contacto.delete()
-        return redirect("contacto_salud_list", id_paciente=paciente.paciente_UUID)
+        tocar_pacientes([paciente["paciente_UUID"]])
+        return redirect("contacto_salud_list", id_paciente=paciente["paciente_UUID"])
 
     return render(request, "contacto_salud/contacto_salud_eliminar_confirmacion.html", {
         "paciente": paciente,
         "contacto": contacto,
     })
 
+# 🔤 AUTOCOMPLETAR CATÁLOGOS (JSON para los widgets de los formularios)
+@login_required # Protegida
+def catalogo_autocompletar(request, catalogo):
+    if catalogo not in CATALOGOS_AUTOCOMPLETAR:
+        raise Http404("Catálogo sin autocompletar")
+    consulta = request.GET.get("q", "").strip()
+    try:
+        limite = min(max(int(request.GET.get("limite", LIMITE_RESULTADOS)), 1), 50)
+    except ValueError:
+        limite = LIMITE_RESULTADOS
+
+    resultados = indice(catalogo).buscar(consulta, limite) if consulta else []
+    return JsonResponse({"resultados": [{"codigo": codigo, "nombre": nombre} for codigo, nombre in resultados]})
+
+# Estado de la caché de catálogos de este proceso (versión, aciertos y fallos por tabla)
+@staff_member_required
+def catalogos_cache_estado(request):
+    return JsonResponse(catalogos.estadisticas())
+
 # Vistas de Autenticación
 def register_view(request):
     if request.method == 'POST':
@@ -0,0 +1,61 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import models
+
+
+def _clave(field, valor):
+    if isinstance(valor, models.Model):
+        valor = valor.pk
+    return field.target_field.to_python(valor)
+
+
+def diferencia_vinculos(model, campo_origen: str, campo_destino: str, deseados: Dict[object, Iterable],
+                        batch_size: int = 0) -> Tuple[Set[Tuple], List]:
+    """
+    Compara los vínculos deseados (origen -> destinos, como objetos o PKs) de una
+    tabla puente con los guardados para esos orígenes. Retorna los pares
+    (origen, destino) que faltan y las PKs de las filas que sobran. Lee los
+    vínculos actuales en una consulta por lote de `batch_size` orígenes.
+    """
+    origen = model._meta.get_field(campo_origen)
+    destino = model._meta.get_field(campo_destino)
+    deseados = {_clave(origen, o): {_clave(destino, d) for d in ds} for o, ds in deseados.items()}
+
+    origenes = list(deseados)
+    paso = batch_size or len(origenes) or 1
+    actuales = {}
+    for inicio in range(0, len(origenes), paso):
+        filas = model.objects.filter(**{f"{origen.attname}__in": origenes[inicio:inicio + paso]}).values_list(
+            "pk", origen.attname, destino.attname
+        )
+        actuales.update(((o, d), pk) for pk, o, d in filas)
+
+    faltantes = {(o, d) for o, ds in deseados.items() for d in ds} - actuales.keys()
+    sobrantes = [pk for (o, d), pk in actuales.items() if d not in deseados[o]]
+    return faltantes, sobrantes
+
+
+def sincronizar_vinculos(model, campo_origen: str, campo_destino: str, deseados: Dict[object, Iterable],
+                         eliminar: bool = True, batch_size: int = 0) -> Tuple[int, int]:
+    """
+    Deja los vínculos de cada origen de `deseados` iguales al conjunto dado: un
+    DELETE para los que sobran (si `eliminar`) y un bulk_create para los que
+    faltan, sin tocar los que ya estaban. Con eliminar=False solo agrega.
+    Retorna (agregados, eliminados).
+    """
+    faltantes, sobrantes = diferencia_vinculos(model, campo_origen, campo_destino, deseados, batch_size)
+    if not eliminar:
+        sobrantes = []
+
+    paso = batch_size or len(sobrantes) or 1
+    for inicio in range(0, len(sobrantes), paso):
+        model.objects.filter(pk__in=sobrantes[inicio:inicio + paso]).delete()
+
+    origen = model._meta.get_field(campo_origen).attname
+    destino = model._meta.get_field(campo_destino).attname
+    model.objects.bulk_create(
+        [model(**{origen: o, destino: d}) for o, d in faltantes],
+        batch_size=batch_size or None,
+        ignore_conflicts=True,
+    )
+    return len(faltantes), len(sobrantes)
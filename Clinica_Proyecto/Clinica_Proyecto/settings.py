@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -82,9 +84,27 @@ DATABASES = {
         'PASSWORD': 'toor',
         'HOST': 'localhost',
         'PORT': '3306',
+        # Necesario para import_maestros --fast (LOAD DATA LOCAL INFILE)
+        'OPTIONS': {'local_infile': 1},
     }
 }
 
+# Caché compartida por los procesos web y los comandos (perfiles de pacientes, ver
+# Clinica/perfil_paciente.py). Con varios servidores usar Redis o Memcached, que además
+# hacen atómico el candado contra estampidas (en archivos es de mejor esfuerzo).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'clinica_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Vistas de lectura (listado y detalle de pacientes y contactos) en su versión async;
+# solo tiene sentido bajo ASGI. Por defecto se usan las síncronas: con el ORM síncrono
+# las async no rindieron más ni bajo uvicorn. Medir con `benchmark_views` antes de activarlas.
+VISTAS_ASYNC = os.environ.get('CLINICA_VISTAS_ASYNC') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
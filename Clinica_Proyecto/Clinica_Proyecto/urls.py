@@ -1,13 +1,22 @@
 # Clinica_Proyecto/Clinica_Proyecto/urls.py
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include # Importar include
 from Clinica.views import (
-    crear_paciente, index, paciente_edit, paciente_list, paciente_detail, paciente_delete,
+    crear_paciente, index, paciente_edit, paciente_list, paciente_detail, paciente_delete, paciente_search,
     contacto_salud_create, contacto_salud_details, contacto_salud_edit, contacto_salud_delete, contacto_salud_list,
+    apaciente_list, apaciente_detail, acontacto_salud_list, acontacto_salud_details,
+    catalogo_autocompletar, catalogos_cache_estado,
     register_view, login_view, logout_view, dashboard # Nuevas vistas
 )
 
+# Vistas de lectura async, solo con CLINICA_VISTAS_ASYNC=1 (ver VISTAS_ASYNC en settings.py)
+if settings.VISTAS_ASYNC:
+    paciente_list, paciente_detail, contacto_salud_list, contacto_salud_details = (
+        apaciente_list, apaciente_detail, acontacto_salud_list, acontacto_salud_details
+    )
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', index, name='index'),
@@ -20,6 +29,7 @@ urlpatterns = [
 
     # Rutas existentes, ahora protegidas con @login_required en views.py
     path('pacientes/', paciente_list, name='paciente_list'),
+    path('pacientes/buscar/', paciente_search, name='paciente_search'),
     path('pacientes/<uuid:id>/', paciente_detail, name='paciente_detail'),
     path("pacientes/nuevo/", crear_paciente, name="paciente_create"),
     path("pacientes/<uuid:id>/eliminar/", paciente_delete, name="paciente_delete"),
@@ -29,4 +39,6 @@ urlpatterns = [
     path('pacientes/<uuid:id_paciente>/contactos/<uuid:id_contacto>/', contacto_salud_details, name='contacto_salud_details'),
     path('pacientes/<uuid:id_paciente>/contactos/<uuid:id_contacto>/editar/',contacto_salud_edit, name='contacto_salud_edit'),
     path('pacientes/<uuid:id_paciente>/contactos/<uuid:id_contacto>/eliminar/', contacto_salud_delete, name='contacto_salud_delete'),
+    path('catalogos/cache/', catalogos_cache_estado, name='catalogos_cache_estado'),
+    path('catalogos/<str:catalogo>/autocompletar/', catalogo_autocompletar, name='catalogo_autocompletar'),
 ]
\ No newline at end of file